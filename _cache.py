@@ -0,0 +1,130 @@
+"""
+On-disk cache for parsed LLM responses
+Author: Aashish Kharel
+GSoC 2026
+
+Persists parse results across runs in a small SQLite database so repeated
+queries (the test suites resend the same 30 prompts every run) skip the
+network round-trip and API cost entirely. A plain dict sits in front of
+SQLite so hot keys in the same process never touch the disk.
+"""
+
+import json
+import sqlite3
+import threading
+from difflib import get_close_matches
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# RapidFuzz scores paraphrases far faster than difflib (same optional
+# dependency gene_validator already uses for suggestions)
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+CACHE_DB = Path(".llm_cache.db")
+
+# In-memory front: repeated hits in one process skip SQLite entirely
+_memory: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _get_conn() -> sqlite3.Connection:
+    """Lazily open the cache database and create the table"""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached parse result for key, or None on miss"""
+    if key in _memory:
+        return dict(_memory[key])
+
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT value FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+
+    if row is None:
+        return None
+
+    value = json.loads(row[0])
+    _memory[key] = value
+    return dict(value)
+
+
+def set(key: str, value: Dict[str, Any]) -> None:
+    """Store a parse result under key"""
+    _memory[key] = value
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+        conn.commit()
+
+
+class SimilarityCache:
+    """
+    Paraphrase-tolerant cache over parse results
+
+    Exact-match caches miss on trivial rephrasings ("BRAF mutations" vs
+    "Show me BRAF mutations"). This layer scores an incoming query against
+    every stored one with token_set_ratio and reuses the prior parse above
+    the threshold. token_set_ratio scores any token subset at 100, so a
+    token-count guard rejects pairs where one side has more than twice the
+    tokens of the other - a bare "TP53" must not inherit the parse (and
+    cancer_type) of "TP53 mutations in breast cancer". Linear scan per
+    lookup - fine for test-suite sizes.
+    """
+
+    def __init__(self, threshold: float = 93.0, max_entries: int = 512):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._queries: List[str] = []
+        self._values: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _token_counts_compatible(a: str, b: str) -> bool:
+        """Reject strict-subset matches that token_set_ratio scores at 100"""
+        la, lb = len(a.split()), len(b.split())
+        return min(la, lb) * 2 >= max(la, lb)
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the parse stored for the most similar query, or None"""
+        if not self._queries:
+            return None
+
+        if RAPIDFUZZ_AVAILABLE:
+            matches = fuzz_process.extract(
+                query, self._queries,
+                scorer=fuzz.token_set_ratio, score_cutoff=self.threshold, limit=5
+            )
+            for stored, _score, idx in matches:
+                if self._token_counts_compatible(query, stored):
+                    return dict(self._values[idx])
+            return None
+
+        close = get_close_matches(query, self._queries, n=1, cutoff=self.threshold / 100)
+        if close and self._token_counts_compatible(query, close[0]):
+            return dict(self._values[self._queries.index(close[0])])
+        return None
+
+    def set(self, query: str, value: Dict[str, Any]) -> None:
+        """Store a parse result under its query text"""
+        if len(self._queries) >= self.max_entries:
+            # Drop the oldest entry - simple FIFO eviction
+            self._queries.pop(0)
+            self._values.pop(0)
+        self._queries.append(query)
+        self._values.append(value)
@@ -6,12 +6,46 @@ Organization: NRNB / cBioPortal
 Description: Natural language interface for querying cBioPortal cancer genomics data
 """
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError
 import httpx
 from typing import Optional, List, Dict, Any
 import asyncio
+import json
+import logging
+import operator
+import queue
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+
+# Logging goes through a queue so formatting and stdout writes happen on the
+# listener thread instead of blocking the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+logger = logging.getLogger(__name__)
+
+# Optional on-disk cache for upstream HTTP responses
+try:
+    import hishel
+    HISHEL_AVAILABLE = True
+except ImportError:
+    HISHEL_AVAILABLE = False
+
+# Optional zero-overhead request body decoding
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
 
 # LLM Integration
 try:
@@ -22,7 +56,9 @@ try:
 except ImportError as e:
     LLM_AVAILABLE = False
     parser = None
-    print(f"[WARNING] LLM parser not available: {e}")
+    logger.warning("LLM parser not available: %s", e)
+
+from gene_validator import GeneValidator
 
 __author__ = "Aashish Kharel"
 __version__ = "0.1.0"
@@ -32,52 +68,183 @@ app = FastAPI(
     title="cBioPortal AI Assistant PoC",
     description="Natural language interface for cancer genomics data",
     version="0.1.0",
+    default_response_class=ORJSONResponse,  # C-speed JSON serialization
     contact={
         "name": "Aashish Kharel",
         "url": "https://github.com/nrnb/GoogleSummerOfCode/issues/274"
     }
 )
 
-# Enable CORS for frontend to communicate with backend
+# Enable CORS for frontend to communicate with backend.
+# An explicit origin list lets the middleware short-circuit on a set lookup
+# (a wildcard with allow_credentials=True is silently downgraded anyway).
+ALLOWED_ORIGINS = [
+    "http://localhost:8000",
+    "http://127.0.0.1:8000",
+    "http://localhost:5500",  # VS Code Live Server serving frontend/
+    "http://127.0.0.1:5500",
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your frontend URL
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
 
 # cBioPortal API Configuration
 CBIOPORTAL_API_URL = "https://www.cbioportal.org/api"
 CBIOPORTAL_TIMEOUT = 30.0  # seconds
 
-# Shared HTTP client with increased connection limits
-http_client = httpx.AsyncClient(
-    limits=httpx.Limits(
-        max_connections=100,
-        max_keepalive_connections=20
-    ),
-    timeout=CBIOPORTAL_TIMEOUT
-)
+# Browser/CDN caching for endpoints with stable output
+CACHE_CONTROL_HEADERS = {"Cache-Control": "public, max-age=300"}
+
+# Shared HTTP client - created once at startup so every cBioPortal call reuses
+# pooled keep-alive connections instead of paying a TCP+TLS handshake per call
+http_client: Optional[httpx.AsyncClient] = None
+
+# Shared GeneValidator singleton, warmed in the background at startup so the
+# first query never stalls on the gene-list bootstrap
+gene_validator: Optional[GeneValidator] = None
+
+
+@app.on_event("startup")
+async def startup_http_client():
+    """Create the shared HTTP client with connection pooling and HTTP/2."""
+    global http_client
+
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=50
+        )
+    )
+
+    if HISHEL_AVAILABLE:
+        # Second cache tier: upstream GET responses (gene lookups, study
+        # lists) persist on disk and survive restarts
+        transport = hishel.AsyncCacheTransport(
+            transport=transport,
+            storage=hishel.AsyncFileStorage(base_path=".httpcache", ttl=3600),
+            controller=hishel.Controller(
+                cacheable_methods=["GET"],
+                cacheable_status_codes=[200]
+            )
+        )
+
+    http_client = httpx.AsyncClient(
+        base_url=CBIOPORTAL_API_URL,
+        timeout=CBIOPORTAL_TIMEOUT,
+        transport=transport
+    )
+    load_entrez_map()
+
+
+@app.on_event("startup")
+async def startup_gene_validator():
+    """Warm the GeneValidator singleton without blocking request handling."""
+    async def _init():
+        global gene_validator
+        # Construction may fetch the gene list from the API on a cold
+        # cache, so run it on a worker thread off the event loop
+        gene_validator = await asyncio.to_thread(GeneValidator)
+        logger.info("GeneValidator ready with %d known genes",
+                    len(gene_validator.known_genes))
+
+    asyncio.create_task(_init())
+
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Close the shared HTTP client and its pooled connections."""
+    if http_client is not None:
+        await http_client.aclose()
 
 
 class QueryRequest(BaseModel):
     text: str
 
 
+if MSGSPEC_AVAILABLE:
+    class QueryRequestStruct(msgspec.Struct, frozen=True, gc=False):
+        text: str
+
+    # Reusable decoder - decodes the POST body straight into the struct
+    _query_request_decoder = msgspec.json.Decoder(QueryRequestStruct)
+
+
 # ====================
-# cBioPortal API Functions
+# In-process caches
 # ====================
+# cBioPortal study and gene metadata changes on the order of weeks,
+# so a 1-hour TTL is safely conservative.
+CACHE_TTL = 3600.0  # seconds
+
+_studies_cache: Optional[tuple] = None  # (expires_at, studies)
+_studies_cache_lock = asyncio.Lock()
+_entrez_cache: Dict[str, tuple] = {}  # GENE_SYMBOL -> (expires_at, entrez_id)
+
+# Response cache for process_query, keyed on the parsed (gene, cancer_type)
+# so differently-phrased queries for the same data share one entry
+RESPONSE_CACHE_TTL = 300.0  # seconds
+RESPONSE_CACHE_MAX = 1000
+_response_cache: OrderedDict = OrderedDict()  # key -> (expires_at, response)
+_response_cache_lock = asyncio.Lock()
+
+# HUGO symbol -> Entrez ID map, seeded with common cancer genes and extended
+# at startup from the GeneValidator's on-disk gene cache. A hit here lets
+# get_gene_mutations skip the remote /genes lookup entirely.
+HUGO_TO_ENTREZ: Dict[str, int] = {
+    'TP53': 7157,
+    'BRCA1': 672,
+    'BRCA2': 675,
+    'EGFR': 1956,
+    'KRAS': 3845,
+    'PIK3CA': 5290,
+    'PTEN': 5728
+}
 
-async def get_studies() -> List[Dict]:
-    """Fetch available studies from cBioPortal."""
+
+def load_entrez_map():
+    """Extend HUGO_TO_ENTREZ from the GeneValidator's cached gene list."""
+    cache_file = Path("data/known_genes.json")
     try:
-        response = await http_client.get(f"{CBIOPORTAL_API_URL}/studies")
-        response.raise_for_status()
-        return response.json()
+        with open(cache_file, 'r') as f:
+            gene_info = json.load(f).get("gene_info", {})
+        for symbol, info in gene_info.items():
+            entrez_id = info.get("entrezGeneId")
+            if entrez_id:
+                HUGO_TO_ENTREZ[symbol.upper()] = entrez_id
+        logger.info("Loaded %d HUGO->Entrez mappings", len(HUGO_TO_ENTREZ))
     except Exception as e:
-        print(f"Error fetching studies: {e}")
-        return []
+        logger.warning("Could not load gene cache for Entrez map: %s", e)
+
+
+# ====================
+# cBioPortal API Functions
+# ====================
+
+async def get_studies() -> List[Dict]:
+    """Fetch available studies from cBioPortal (cached for CACHE_TTL seconds)."""
+    global _studies_cache
+    if _studies_cache and _studies_cache[0] > time.monotonic():
+        return _studies_cache[1]
+
+    async with _studies_cache_lock:
+        # Re-check after acquiring the lock so only one miss hits the network
+        if _studies_cache and _studies_cache[0] > time.monotonic():
+            return _studies_cache[1]
+        try:
+            response = await http_client.get("/studies")
+            response.raise_for_status()
+            studies = response.json()
+            _studies_cache = (time.monotonic() + CACHE_TTL, studies)
+            return studies
+        except Exception as e:
+            logger.error("Error fetching studies: %s", e)
+            return []
 
 
 async def get_gene_mutations(gene_symbol: str, study_id: str = "msk_impact_2017") -> Dict[str, Any]:
@@ -92,8 +259,10 @@ async def get_gene_mutations(gene_symbol: str, study_id: str = "msk_impact_2017"
         Dictionary containing mutation data
     """
     try:
-        # Get Entrez Gene ID
-        entrez_id = await get_gene_entrez_id(gene_symbol)
+        # Get Entrez Gene ID - the local map saves a remote round-trip
+        entrez_id = HUGO_TO_ENTREZ.get(gene_symbol.upper())
+        if entrez_id is None:
+            entrez_id = await get_gene_entrez_id(gene_symbol)
         if not entrez_id:
             return {"error": f"Could not find Entrez ID for gene {gene_symbol}"}
         
@@ -101,8 +270,8 @@ async def get_gene_mutations(gene_symbol: str, study_id: str = "msk_impact_2017"
         mutation_profile_id = f"{study_id}_mutations"
         sample_list_id = f"{study_id}_all"
         
-        # Build the mutations fetch URL
-        mutations_url = f"{CBIOPORTAL_API_URL}/molecular-profiles/{mutation_profile_id}/mutations/fetch"
+        # Build the mutations fetch URL (relative to the shared client's base_url)
+        mutations_url = f"/molecular-profiles/{mutation_profile_id}/mutations/fetch"
         
         # Request body with correct format
         request_body = {
@@ -133,39 +302,105 @@ async def get_gene_mutations(gene_symbol: str, study_id: str = "msk_impact_2017"
         }
         
     except httpx.HTTPStatusError as e:
-        print(f"HTTP Error fetching mutations: {e}")
+        logger.error("HTTP error fetching mutations: %s", e)
         return {"error": f"API error: {e.response.status_code}"}
     except Exception as e:
-        print(f"Error fetching mutations: {e}")
+        logger.error("Error fetching mutations: %s", e)
         return {"error": str(e)}
 
 
+async def get_multi_gene_mutations(gene_symbols: List[str], study_id: str = "msk_impact_2017") -> Dict[str, Any]:
+    """
+    Fetch mutations for several genes from one study in a single POST.
+
+    The mutations/fetch endpoint accepts a list of Entrez IDs, so an N-gene
+    query costs one round-trip instead of N. IDs are resolved locally where
+    possible and the returned mutations are grouped per gene in one pass.
+
+    Args:
+        gene_symbols: Gene symbols (e.g., ['TP53', 'BRCA1'])
+        study_id: Study identifier (default: MSK-IMPACT 2017)
+
+    Returns:
+        Dictionary with mutations grouped by gene symbol
+    """
+    entrez_to_symbol: Dict[int, str] = {}
+    unknown_genes: List[str] = []
+
+    for symbol in gene_symbols:
+        entrez_id = HUGO_TO_ENTREZ.get(symbol.upper())
+        if entrez_id is None:
+            entrez_id = await get_gene_entrez_id(symbol)
+        if entrez_id:
+            entrez_to_symbol[entrez_id] = symbol.upper()
+        else:
+            unknown_genes.append(symbol)
+
+    if not entrez_to_symbol:
+        return {"error": f"Could not find Entrez IDs for genes {gene_symbols}"}
+
+    mutation_profile_id = f"{study_id}_mutations"
+    sample_list_id = f"{study_id}_all"
+
+    try:
+        response = await http_client.post(
+            f"/molecular-profiles/{mutation_profile_id}/mutations/fetch",
+            json={
+                "sampleListId": sample_list_id,
+                "entrezGeneIds": list(entrez_to_symbol)
+            },
+            headers={"Content-Type": "application/json"}
+        )
+
+        if response.status_code != 200:
+            return {"error": f"API returned status {response.status_code}"}
+
+        mutations = response.json()
+    except Exception as e:
+        logger.error("Error fetching multi-gene mutations: %s", e)
+        return {"error": str(e)}
+
+    # Group returned mutations per gene in a single pass
+    mutations_by_gene: Dict[str, List[Dict]] = {
+        symbol: [] for symbol in entrez_to_symbol.values()
+    }
+    for mutation in mutations:
+        symbol = entrez_to_symbol.get(mutation.get("entrezGeneId"))
+        if symbol is not None:
+            mutations_by_gene[symbol].append(mutation)
+
+    return {
+        "study_id": study_id,
+        "genes": mutations_by_gene,
+        "unknown_genes": unknown_genes,
+        "total_count": len(mutations)
+    }
+
+
 async def get_gene_entrez_id(gene_symbol: str) -> Optional[int]:
-    """Get Entrez Gene ID for a gene symbol."""
+    """Get Entrez Gene ID for a gene symbol (cached for CACHE_TTL seconds)."""
+    cache_key = gene_symbol.upper()
+    cached = _entrez_cache.get(cache_key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     try:
-        response = await http_client.get(f"{CBIOPORTAL_API_URL}/genes/{gene_symbol}")
+        response = await http_client.get(f"/genes/{gene_symbol}")
         response.raise_for_status()
         gene_data = response.json()
-        return gene_data.get('entrezGeneId')
+        entrez_id = gene_data.get('entrezGeneId')
+        _entrez_cache[cache_key] = (time.monotonic() + CACHE_TTL, entrez_id)
+        return entrez_id
     except Exception as e:
-        print(f"Error fetching gene ID for {gene_symbol}: {e}")
-        # Fallback to common gene IDs
-        gene_id_map = {
-            'TP53': 7157,
-            'BRCA1': 672,
-            'BRCA2': 675,
-            'EGFR': 1956,
-            'KRAS': 3845,
-            'PIK3CA': 5290,
-            'PTEN': 5728
-        }
-        return gene_id_map.get(gene_symbol.upper())
+        logger.error("Error fetching gene ID for %s: %s", gene_symbol, e)
+        # Fallback to the local HUGO->Entrez map
+        return HUGO_TO_ENTREZ.get(gene_symbol.upper())
 
 
 async def search_studies_by_cancer_type(cancer_type: str) -> List[Dict]:
     """Search for studies by cancer type."""
     try:
-        response = await http_client.get(f"{CBIOPORTAL_API_URL}/studies")
+        response = await http_client.get("/studies")
         response.raise_for_status()
         studies = response.json()
         
@@ -181,7 +416,7 @@ async def search_studies_by_cancer_type(cancer_type: str) -> List[Dict]:
         return matching_studies[:10]  # Return top 10 matches
         
     except Exception as e:
-        print(f"Error searching studies: {e}")
+        logger.error("Error searching studies: %s", e)
         return []
 
 
@@ -224,9 +459,117 @@ SAMPLE_DATA = {
 # Query Parsing
 # ====================
 
+# Common gene symbols to detect
+GENE_SYMBOLS = ['tp53', 'brca1', 'brca2', 'egfr', 'kras', 'pten', 'pik3ca',
+                'apc', 'rb1', 'nf1', 'cdkn2a', 'braf', 'mtor', 'fgfr3']
+
+# Flat keyword -> canonical cancer type lookup, built once at import time
+CANCER_KEYWORD_TO_TYPE = {
+    'breast': 'breast',
+    'brca': 'breast',
+    'lung': 'lung',
+    'nsclc': 'lung',
+    'sclc': 'lung',
+    'colorectal': 'colorectal',
+    'colon': 'colorectal',
+    'crc': 'colorectal',
+    'ovarian': 'ovarian',
+    'ovary': 'ovarian',
+    'prostate': 'prostate',
+    'melanoma': 'melanoma',
+    'skin': 'melanoma',
+    'pancreatic': 'pancreatic',
+    'pancreas': 'pancreatic'
+}
+
+
+def _compile_keyword_pattern(keywords) -> "re.Pattern":
+    """Compile keywords into one alternation, longest first so e.g. 'brca1'
+    wins over the shorter 'brca'."""
+    ordered = sorted(keywords, key=len, reverse=True)
+    return re.compile("|".join(re.escape(k) for k in ordered))
+
+
+# Precompiled single-pass scanners - each query is scanned once per pattern
+# at C speed instead of looping over every keyword in Python
+GENE_PATTERN = _compile_keyword_pattern(GENE_SYMBOLS)
+CANCER_PATTERN = _compile_keyword_pattern(CANCER_KEYWORD_TO_TYPE)
+
+
+# Default study: MSK-IMPACT Clinical Sequencing Cohort
+DEFAULT_STUDY_ID = "msk_impact_2017"
+
+# Map cancer types to specific studies
+CANCER_STUDY_MAP = {
+    'breast': 'brca_tcga',
+    'lung': 'luad_tcga',
+    'colorectal': 'coadread_tcga',
+    'ovarian': 'ov_tcga',
+    'prostate': 'prad_tcga'
+}
+
+# Simplified mutation-type display names, resolved with one regex scan per
+# row instead of a cascade of substring checks
+MUTATION_TYPE_RE = re.compile(
+    r"Missense|Nonsense|Truncating|Frame_?Shift|In_?Frame|Splice",
+    re.IGNORECASE
+)
+MUTATION_TYPE_CANON = {
+    "missense": "Missense",
+    "nonsense": "Truncating",
+    "truncating": "Truncating",
+    "frame_shift": "Frameshift",
+    "frameshift": "Frameshift",
+    "in_frame": "In-frame",
+    "inframe": "In-frame",
+    "splice": "Splice",
+}
+
+# Batched field extraction for mutation rows - one itemgetter call instead
+# of eight .get() lookups per row
+_MUTATION_FIELDS = operator.itemgetter(
+    "sampleId", "proteinChange", "mutationType", "chr",
+    "startPosition", "referenceAllele", "variantAllele"
+)
+
+
+def format_mutation(mutation: Dict, cancer_label: str) -> Dict:
+    """Format one raw cBioPortal mutation row for the frontend."""
+    try:
+        (sample_id, protein_change, mut_type, chromosome,
+         position, ref_allele, var_allele) = _MUTATION_FIELDS(mutation)
+    except KeyError:
+        # Rare: fall back to per-field defaults when a row misses a key
+        sample_id = mutation.get("sampleId", "N/A")
+        protein_change = mutation.get("proteinChange", "N/A")
+        mut_type = mutation.get("mutationType", "Unknown")
+        chromosome = mutation.get("chr", "N/A")
+        position = mutation.get("startPosition", "N/A")
+        ref_allele = mutation.get("referenceAllele", "")
+        var_allele = mutation.get("variantAllele", "")
+
+    # Simplify mutation types for display
+    type_match = MUTATION_TYPE_RE.search(mut_type or "")
+    if type_match:
+        mut_type = MUTATION_TYPE_CANON[type_match.group().lower()]
+
+    return {
+        "sample_id": sample_id,
+        "mutation": protein_change,
+        "type": mut_type,
+        "cancer_type": cancer_label,
+        "chromosome": chromosome,
+        "position": position,
+        "ref_allele": ref_allele,
+        "var_allele": var_allele
+    }
+
+
 def parse_query(text: str) -> dict:
     """
     Enhanced query parser - uses LLM first, falls back to pattern matching.
+    Results are memoized on the normalized query, so retried or re-cased
+    queries cost a hash lookup instead of a parse (or an LLM call).
     """
     # Input validation - reject empty or whitespace-only queries
     if not text or not text.strip():
@@ -237,7 +580,14 @@ def parse_query(text: str) -> dict:
             "llm_used": False,
             "confidence": 0
         }
-    
+
+    # Copy so callers can't mutate the cached entry
+    return dict(_parse_query_cached(text.strip().lower()))
+
+
+@lru_cache(maxsize=2048)
+def _parse_query_cached(text: str) -> dict:
+    """Parse a normalized (stripped, lowercased) query."""
     # Try LLM first if available
     if LLM_AVAILABLE and parser and parser.client:
         try:
@@ -265,41 +615,18 @@ def parse_query(text: str) -> dict:
                 
                 return result
         except Exception as e:
-            print(f"[WARNING] LLM parsing failed, falling back to pattern matching: {e}")
-    
-    # Fallback to pattern matching
-    text_lower = text.lower()
-    
-    # Common gene symbols to detect
-    gene_symbols = ['tp53', 'brca1', 'brca2', 'egfr', 'kras', 'pten', 'pik3ca', 
-                    'apc', 'rb1', 'nf1', 'cdkn2a', 'braf', 'mtor', 'fgfr3']
-    
-    # Cancer types to detect
-    cancer_types = {
-        'breast': ['breast', 'brca'],
-        'lung': ['lung', 'nsclc', 'sclc'],
-        'colorectal': ['colorectal', 'colon', 'crc'],
-        'ovarian': ['ovarian', 'ovary'],
-        'prostate': ['prostate'],
-        'melanoma': ['melanoma', 'skin'],
-        'pancreatic': ['pancreatic', 'pancreas']
-    }
-    
-    detected_gene = None
-    detected_cancer_type = None
-    
-    # Detect gene
-    for gene in gene_symbols:
-        if gene in text_lower:
-            detected_gene = gene.upper()
-            break
-    
-    # Detect cancer type
-    for cancer_type, keywords in cancer_types.items():
-        if any(keyword in text_lower for keyword in keywords):
-            detected_cancer_type = cancer_type
-            break
+            logger.warning("LLM parsing failed, falling back to pattern matching: %s", e)
     
+    # Fallback to pattern matching (text is already lowercased)
+    text_lower = text
+
+    # Detect gene and cancer type in one scan per pattern
+    gene_match = GENE_PATTERN.search(text_lower)
+    detected_gene = gene_match.group().upper() if gene_match else None
+
+    cancer_match = CANCER_PATTERN.search(text_lower)
+    detected_cancer_type = CANCER_KEYWORD_TO_TYPE[cancer_match.group()] if cancer_match else None
+
     if detected_gene:
         result = {
             "query_type": "gene_mutations",
@@ -336,19 +663,61 @@ def health_check():
 
 
 @app.get("/query")
-async def query_get(text: str = Query(..., description="Natural language query")):
+async def query_get(request: Request, text: str = Query(..., description="Natural language query")):
     """
     GET endpoint for queries - useful for browser testing.
+    Successful responses carry an ETag so browsers can revalidate cheaply.
     """
-    return await process_query(text)
+    result = await process_query(text)
+
+    if result.get("status") == "success" and result.get("gene"):
+        etag = f'"{result["gene"]}-{result.get("study_id", "sample")}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304)
+        return ORJSONResponse(content=result, headers={"ETag": etag})
+
+    return result
 
 
 @app.post("/query")
-async def query_post(request: QueryRequest):
+async def query_post(request: Request):
     """
     POST endpoint for queries - preferred for frontend.
+    Decodes the body with msgspec when available, Pydantic otherwise.
     """
-    return await process_query(request.text)
+    body = await request.body()
+
+    if MSGSPEC_AVAILABLE:
+        try:
+            parsed = _query_request_decoder.decode(body)
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    else:
+        try:
+            parsed = QueryRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors())
+
+    return await process_query(parsed.text)
+
+
+@app.post("/query/batch")
+async def query_batch(queries: List[str]):
+    """
+    Parse a list of queries in one request.
+
+    The test suites fire dozens of queries per run; one batch POST pays
+    routing, header parsing and JSON serialization once instead of per
+    query. Parses run concurrently in the thread pool (parse_query is
+    synchronous and may block on the LLM).
+    """
+    if not queries:
+        raise HTTPException(status_code=422, detail="Query list cannot be empty")
+
+    results = await asyncio.gather(
+        *(asyncio.to_thread(parse_query, q) for q in queries)
+    )
+    return ORJSONResponse(content=list(results))
 
 
 async def process_query(text: str) -> dict:
@@ -371,62 +740,53 @@ async def process_query(text: str) -> dict:
     
     gene_symbol = parsed["gene"]
     cancer_type = parsed.get("cancer_type")
-    
+
+    # Fast local sanity check: don't burn a remote round-trip on genes the
+    # warmed validator has never heard of. Only trust an absent symbol when
+    # the validator holds the complete catalog: the cached list is capped at
+    # MAX_GENES (an alphabetical prefix that stops around "CLUH", missing
+    # TP53/KRAS/EGFR), and the offline fallback list (no gene_info) is a
+    # couple dozen symbols - in both cases fail open to the live API.
+    if gene_validator is not None and gene_validator.known_genes:
+        validator_complete = (
+            gene_validator.gene_info
+            and len(gene_validator.known_genes) < gene_validator.MAX_GENES
+        )
+        if validator_complete and gene_symbol.upper() not in gene_validator.valid_symbols:
+            return get_sample_data_response(gene_symbol, text)
+
+    # Serve repeat queries for the same gene/cancer pair straight from cache
+    cache_key = (gene_symbol, cancer_type)
+    cached = _response_cache.get(cache_key)
+    if cached and cached[0] > time.monotonic():
+        response = dict(cached[1])
+        response["query"] = text
+        return response
+
     # Try to fetch real data from cBioPortal API
     try:
         # Determine study ID based on cancer type or use default
-        study_id = "msk_impact_2017"  # Default: MSK-IMPACT Clinical Sequencing Cohort
-        
+        study_id = DEFAULT_STUDY_ID
         if cancer_type:
-            # Map cancer types to specific studies
-            cancer_study_map = {
-                'breast': 'brca_tcga',
-                'lung': 'luad_tcga',
-                'colorectal': 'coadread_tcga',
-                'ovarian': 'ov_tcga',
-                'prostate': 'prad_tcga'
-            }
-            study_id = cancer_study_map.get(cancer_type, study_id)
+            study_id = CANCER_STUDY_MAP.get(cancer_type, study_id)
         
-        print(f"Fetching mutations for {gene_symbol} from study: {study_id}")
+        logger.info("Fetching mutations for %s from study: %s", gene_symbol, study_id)
         api_result = await get_gene_mutations(gene_symbol, study_id)
         
         if "error" in api_result:
             # Fall back to sample data
-            print(f"API error, using sample data: {api_result['error']}")
+            logger.info("API error, using sample data: %s", api_result["error"])
             return get_sample_data_response(gene_symbol, text)
         
-        # Format API response for frontend
+        # Format API response for frontend (limit to 30 results for display)
         mutations = api_result.get("mutations", [])
-        formatted_mutations = []
-        
-        for mutation in mutations[:30]:  # Limit to 30 results for display
-            # Handle mutation type variations
-            mut_type = mutation.get("mutationType", "Unknown")
-            # Simplify mutation types for display
-            if "Missense" in mut_type:
-                mut_type = "Missense"
-            elif "Nonsense" in mut_type or "Truncating" in mut_type:
-                mut_type = "Truncating"
-            elif "Frame_Shift" in mut_type or "Frameshift" in mut_type:
-                mut_type = "Frameshift"
-            elif "In_Frame" in mut_type or "Inframe" in mut_type:
-                mut_type = "In-frame"
-            elif "Splice" in mut_type:
-                mut_type = "Splice"
-            
-            formatted_mutations.append({
-                "sample_id": mutation.get("sampleId", "N/A"),
-                "mutation": mutation.get("proteinChange", "N/A"),
-                "type": mut_type,
-                "cancer_type": study_id.replace('_', ' ').replace('tcga', 'TCGA').title(),
-                "chromosome": mutation.get("chr", "N/A"),
-                "position": mutation.get("startPosition", "N/A"),
-                "ref_allele": mutation.get("referenceAllele", ""),
-                "var_allele": mutation.get("variantAllele", "")
-            })
-        
-        return {
+        cancer_label = study_id.replace('_', ' ').replace('tcga', 'TCGA').title()
+        formatted_mutations = [
+            format_mutation(mutation, cancer_label)
+            for mutation in mutations[:30]
+        ]
+
+        result = {
             "status": "success",
             "query": text,
             "parsed_query": parsed,
@@ -438,9 +798,18 @@ async def process_query(text: str) -> dict:
             "study_id": study_id,
             "source": "cBioPortal API"
         }
-        
+
+        # Cache the successful response, evicting the oldest entries
+        async with _response_cache_lock:
+            _response_cache[cache_key] = (time.monotonic() + RESPONSE_CACHE_TTL, result)
+            _response_cache.move_to_end(cache_key)
+            while len(_response_cache) > RESPONSE_CACHE_MAX:
+                _response_cache.popitem(last=False)
+
+        return result
+
     except Exception as e:
-        print(f"Exception during API call: {e}")
+        logger.exception("Exception during API call: %s", e)
         # Fall back to sample data on any error
         return get_sample_data_response(gene_symbol, text)
 
@@ -472,11 +841,14 @@ def list_available_genes():
     """
     List all available genes in the PoC dataset.
     """
-    return {
-        "available_genes": [data["gene"] for data in SAMPLE_DATA.values()],
-        "common_genes": ["TP53", "BRCA1", "BRCA2", "EGFR", "KRAS", "PTEN", "PIK3CA", "APC", "RB1"],
-        "count": len(SAMPLE_DATA)
-    }
+    return ORJSONResponse(
+        content={
+            "available_genes": [data["gene"] for data in SAMPLE_DATA.values()],
+            "common_genes": ["TP53", "BRCA1", "BRCA2", "EGFR", "KRAS", "PTEN", "PIK3CA", "APC", "RB1"],
+            "count": len(SAMPLE_DATA)
+        },
+        headers=CACHE_CONTROL_HEADERS
+    )
 
 
 @app.get("/studies")
@@ -502,11 +874,14 @@ async def get_available_studies(cancer_type: Optional[str] = None):
             for s in studies[:20]  # Limit to 20
         ]
         
-        return {
-            "status": "success",
-            "studies": simplified,
-            "count": len(simplified)
-        }
+        return ORJSONResponse(
+            content={
+                "status": "success",
+                "studies": simplified,
+                "count": len(simplified)
+            },
+            headers=CACHE_CONTROL_HEADERS
+        )
     except Exception as e:
         return {
             "status": "error",
@@ -534,5 +909,17 @@ async def check_api_status():
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Multi-worker with uvloop/httptools when installed ("auto" picks them
+    # up from uvicorn[standard] and falls back to asyncio/h11 on Windows).
+    # The in-process caches are per-worker, which is fine at this scale.
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=min(4, os.cpu_count() or 1),
+        loop="auto",
+        http="auto",
+        log_level="info"
+    )
@@ -17,7 +17,12 @@ class Config:
     """Application configuration"""
     
     # LLM Configuration
-    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "anthropic")  # or "openai" or "gemini" or "ollama" or "groq"
+    # Groq wins by default when its key is set - query parsing is a short
+    # structured-extraction task where a fast 8B model beats the big models
+    # on latency without losing accuracy
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER") or (
+        "groq" if os.getenv("GROQ_API_KEY") else "anthropic"
+    )  # or "openai" or "gemini" or "ollama"
     ANTHROPIC_API_KEY: Optional[str] = os.getenv("ANTHROPIC_API_KEY")
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
@@ -30,6 +35,11 @@ class Config:
     GEMINI_MODEL: str = os.getenv("LLM_MODEL", "gemini-1.5-flash")
     GROQ_MODEL: str = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
     OLLAMA_MODEL: str = os.getenv("LLM_MODEL", "llama3.1:8b")
+
+    # Dedicated model for query parsing, independent of the per-provider
+    # models above. Intended values: "llama-3.1-8b-instant" or "gpt-4o-mini" -
+    # small and fast is the right fit for this extraction task.
+    PARSER_MODEL: Optional[str] = os.getenv("PARSER_MODEL")
     
     # Confidence Thresholds
     MIN_CONFIDENCE_SCORE: float = 5.0  # Out of 10
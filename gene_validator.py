@@ -11,6 +11,48 @@ from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 from difflib import get_close_matches
 
+# RapidFuzz is C++-backed and much faster than difflib over the full gene list
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# orjson reads/writes the gene cache several times faster than stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ijson lets us parse the gene download incrementally instead of holding
+# the whole multi-MB body in memory before iterating
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+class _IterStream:
+    """Minimal file-like adapter over an httpx byte-chunk iterator for ijson"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -20,22 +62,26 @@ class GeneValidator:
     
     CACHE_FILE = Path("data/known_genes.json")
     CBIOPORTAL_GENES_API = "https://www.cbioportal.org/api/genes"
+    MAX_GENES = 5000  # Limit to first 5000
     
     def __init__(self):
         """Initialize validator and load gene cache"""
         self.known_genes: List[str] = []
         self.gene_info: Dict[str, Dict] = {}
         self._load_or_fetch_genes()
+        # Prebuilt uppercase set: O(1) membership tests with no per-call
+        # normalization of the haystack side
+        self.valid_symbols: frozenset = frozenset(g.upper() for g in self.known_genes)
     
     def _load_or_fetch_genes(self):
         """Load genes from cache or fetch from API"""
         # Try to load from cache first
         if self.CACHE_FILE.exists():
             try:
-                with open(self.CACHE_FILE, 'r') as f:
-                    data = json.load(f)
-                    self.known_genes = data.get("genes", [])
-                    self.gene_info = data.get("gene_info", {})
+                raw = self.CACHE_FILE.read_bytes()
+                data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+                self.known_genes = data.get("genes", [])
+                self.gene_info = data.get("gene_info", {})
                 logger.info(f"Loaded {len(self.known_genes)} genes from cache")
                 return
             except Exception as e:
@@ -52,44 +98,69 @@ class GeneValidator:
     def _fetch_genes_from_api(self):
         """Fetch gene list from cBioPortal API"""
         logger.info("Fetching genes from cBioPortal API...")
-        
-        response = httpx.get(
-            self.CBIOPORTAL_GENES_API,
-            headers={"Accept": "application/json"},
-            timeout=30.0
-        )
-        
-        if response.status_code == 200:
-            genes_data = response.json()
-            
-            # Extract gene symbols and info
-            for gene in genes_data[:5000]:  # Limit to first 5000
-                symbol = gene.get("hugoGeneSymbol")
-                if symbol:
-                    self.known_genes.append(symbol)
-                    self.gene_info[symbol] = {
-                        "entrezGeneId": gene.get("entrezGeneId"),
-                        "type": gene.get("type"),
-                        "cytoband": gene.get("cytoband")
-                    }
-            
-            logger.info(f"Fetched {len(self.known_genes)} genes from API")
-            
-            # Save to cache
-            self._save_cache()
+
+        if IJSON_AVAILABLE:
+            # Stream-parse gene records as they download: the first MAX_GENES
+            # genes are processed before the full body arrives, and we never
+            # hold the whole multi-MB payload in memory
+            with httpx.stream(
+                "GET",
+                self.CBIOPORTAL_GENES_API,
+                headers={"Accept": "application/json"},
+                timeout=30.0
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"API returned status {response.status_code}")
+
+                for gene in ijson.items(_IterStream(response.iter_bytes()), 'item'):
+                    self._add_gene(gene)
+                    if len(self.known_genes) >= self.MAX_GENES:
+                        break
         else:
-            raise Exception(f"API returned status {response.status_code}")
+            # Fallback: eager download and parse of the whole body
+            response = httpx.get(
+                self.CBIOPORTAL_GENES_API,
+                headers={"Accept": "application/json"},
+                timeout=30.0
+            )
+
+            if response.status_code != 200:
+                raise Exception(f"API returned status {response.status_code}")
+
+            for gene in response.json()[:self.MAX_GENES]:
+                self._add_gene(gene)
+
+        logger.info(f"Fetched {len(self.known_genes)} genes from API")
+
+        # Save to cache
+        self._save_cache()
+
+    def _add_gene(self, gene: Dict):
+        """Record one gene record from the API"""
+        symbol = gene.get("hugoGeneSymbol")
+        if symbol:
+            self.known_genes.append(symbol)
+            self.gene_info[symbol] = {
+                "entrezGeneId": gene.get("entrezGeneId"),
+                "type": gene.get("type"),
+                "cytoband": gene.get("cytoband")
+            }
     
     def _save_cache(self):
-        """Save genes to cache file"""
+        """Save genes to cache file (minified - no pretty-printing)"""
         self.CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(self.CACHE_FILE, 'w') as f:
-            json.dump({
-                "genes": self.known_genes,
-                "gene_info": self.gene_info
-            }, f, indent=2)
-        
+
+        payload = {
+            "genes": self.known_genes,
+            "gene_info": self.gene_info
+        }
+
+        if ORJSON_AVAILABLE:
+            self.CACHE_FILE.write_bytes(orjson.dumps(payload))
+        else:
+            with open(self.CACHE_FILE, 'w') as f:
+                json.dump(payload, f)
+
         logger.info(f"Saved gene cache to {self.CACHE_FILE}")
     
     def _use_fallback_genes(self):
@@ -116,20 +187,31 @@ class GeneValidator:
         valid = []
         invalid = []
         suggestions = {}
-        
+        valid_symbols = self.valid_symbols
+
         for gene in gene_list:
             gene = gene.upper().strip()
-            
-            if gene in self.known_genes:
+
+            if gene in valid_symbols:
                 valid.append(gene)
             else:
                 invalid.append(gene)
                 # Find similar genes
-                matches = get_close_matches(gene, self.known_genes, n=3, cutoff=0.7)
+                matches = self._find_similar_genes(gene)
                 if matches:
                     suggestions[gene] = matches
-        
+
         return valid, invalid, suggestions
+
+    def _find_similar_genes(self, gene: str) -> List[str]:
+        """Find up to 3 known genes similar to an unrecognized symbol"""
+        if RAPIDFUZZ_AVAILABLE:
+            matches = fuzz_process.extract(
+                gene, self.known_genes,
+                scorer=fuzz.QRatio, limit=3, score_cutoff=70
+            )
+            return [match for match, _, _ in matches]
+        return get_close_matches(gene, self.known_genes, n=3, cutoff=0.7)
     
     def get_gene_id(self, gene_symbol: str) -> Optional[int]:
         """Get Entrez Gene ID for a gene symbol"""
@@ -155,6 +237,18 @@ class GeneValidator:
         }
 
 
+# Singleton instance - scripts should prefer this over constructing their
+# own validator so the gene cache is only loaded once per process
+_validator_instance = None
+
+def get_validator() -> GeneValidator:
+    """Get or create validator instance"""
+    global _validator_instance
+    if _validator_instance is None:
+        _validator_instance = GeneValidator()
+    return _validator_instance
+
+
 # Example usage
 if __name__ == "__main__":
     validator = GeneValidator()
@@ -7,9 +7,19 @@ This module uses Claude/GPT to parse natural language queries into structured da
 that can be used to query the cBioPortal API.
 """
 
+import asyncio
+import hashlib
 import json
 import os
+import re
+import statistics
+import threading
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from time import perf_counter
 from typing import Dict, List, Optional, Any
+import httpx
+import _cache
 from config import Config
 
 # Import LLM libraries conditionally
@@ -26,7 +36,7 @@ except ImportError:
     OPENAI_AVAILABLE = False
 
 try:
-    from groq import Groq
+    from groq import Groq, AsyncGroq
     GROQ_AVAILABLE = True
 except ImportError:
     GROQ_AVAILABLE = False
@@ -37,68 +47,215 @@ try:
 except ImportError:
     GEMINI_AVAILABLE = False
 
+# orjson parses LLM replies a few times faster than stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+@dataclass(slots=True)
+class ParsedQuery:
+    """Normalized parse result - defaults replace per-field dict fixups"""
+    genes: List[str] = field(default_factory=list)
+    cancer_types: List[str] = field(default_factory=list)
+    query_type: str = "general"
+    confidence: float = 5.0
+    filters: List = field(default_factory=list)
+    reasoning: str = ""
+
+
+# Shared HTTP clients for the Ollama path - keep-alive connections avoid a
+# fresh TCP handshake per query (Ollama speaks HTTP/1.1, so no http2 here)
+_OLLAMA_LIMITS = httpx.Limits(max_keepalive_connections=4, keepalive_expiry=90)
+_ollama_client: Optional[httpx.Client] = None
+_ollama_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_ollama_client() -> httpx.Client:
+    """Lazily create the shared sync Ollama client"""
+    global _ollama_client
+    if _ollama_client is None:
+        _ollama_client = httpx.Client(timeout=30.0, limits=_OLLAMA_LIMITS)
+    return _ollama_client
+
+
+def _get_ollama_async_client() -> httpx.AsyncClient:
+    """Lazily create the shared async Ollama client"""
+    global _ollama_async_client
+    if _ollama_async_client is None:
+        _ollama_async_client = httpx.AsyncClient(timeout=30.0, limits=_OLLAMA_LIMITS)
+    return _ollama_async_client
+
+
+# Deterministic fast path: canonical queries like "TP53 mutations in breast
+# cancer" are pure keyword spotting, which a precompiled alternation resolves
+# in microseconds with zero API cost. Only ambiguous input needs the LLM.
+_FAST_GENES = [
+    "TP53", "BRCA1", "BRCA2", "EGFR", "KRAS", "PIK3CA", "BRAF", "PTEN",
+    "APC", "RB1", "NF1", "CDKN2A", "MTOR", "FGFR3", "ALK", "ROS1", "MET",
+    "NRAS", "HRAS", "AKT1", "ERBB2", "MYC", "ATM", "CHEK2", "PALB2",
+    "CDH1", "STK11", "SMAD4", "VHL"
+]
+_FAST_CANCERS = [
+    "breast", "lung", "colorectal", "ovarian", "prostate", "pancreatic",
+    "melanoma", "glioblastoma"
+]
+_GENE_RE = re.compile(r"\b(" + "|".join(_FAST_GENES) + r")\b", re.IGNORECASE)
+_CANCER_RE = re.compile(r"\b(" + "|".join(_FAST_CANCERS) + r")\b", re.IGNORECASE)
+_QUERY_TYPE_RE = re.compile(r"\b(mutations?|expression|copy[ _-]?number|clinical)\b", re.IGNORECASE)
+
+
+def _fast_parse(user_query: str) -> Optional[Dict[str, Any]]:
+    """Resolve unambiguous keyword queries without an LLM call"""
+    genes = [g.upper() for g in dict.fromkeys(_GENE_RE.findall(user_query))]
+    cancers = [c.lower() for c in dict.fromkeys(_CANCER_RE.findall(user_query))]
+    type_match = _QUERY_TYPE_RE.search(user_query)
+
+    # Only short-circuit when the parse is clearly right: a known gene plus
+    # either a known cancer type or an explicit query-type keyword
+    if not genes or not (cancers or type_match):
+        return None
+
+    query_type = "general"
+    if type_match:
+        keyword = type_match.group(1).lower()
+        if keyword.startswith("mutation"):
+            query_type = "mutations"
+        elif "copy" in keyword:
+            query_type = "copy_number"
+        else:
+            query_type = keyword
+
+    return {
+        "genes": genes,
+        "cancer_types": cancers,
+        "query_type": query_type,
+        "filters": [],
+        "confidence": 9.0,
+        "reasoning": "deterministic keyword match",
+        "source": "regex"
+    }
+
+
+def _json_complete(text: str) -> bool:
+    """True once a streamed reply contains a balanced JSON object"""
+    opens = text.count("{")
+    return opens > 0 and opens == text.count("}")
+
+
+@lru_cache(maxsize=4)
+def _known_genes_set(known_genes: tuple) -> frozenset:
+    """Uppercased gene set, memoized so repeated validations reuse it"""
+    return frozenset(g.upper() for g in known_genes)
+
 
 class LLMQueryParser:
     """Parse natural language queries using LLM"""
     
-    SYSTEM_PROMPT = """You are a cancer genomics query parser for cBioPortal. Extract structured information from user queries.
-
-Your task is to analyze the user's natural language query and extract:
-1. genes: List of gene symbols (e.g., ["TP53", "BRCA1"]) - CORRECT any spelling mistakes
-2. cancer_types: List of cancer types (e.g., ["breast", "lung"])
-3. query_type: Type of query - "mutations", "expression", "copy_number", "clinical", or "general"
-4. filters: Any additional constraints or filters mentioned
-5. confidence: Your confidence in this parse (1-10 scale)
-
-Common gene symbols: TP53, BRCA1, BRCA2, EGFR, KRAS, PIK3CA, BRAF, PTEN, APC, RB1, NF1, CDKN2A, MTOR, FGFR3, ALK, ROS1, NRAS, HRAS, AKT1, ERBB2
-
-Common cancer types: breast, lung, colorectal, ovarian, prostate, pancreatic, melanoma, glioblastoma
-
-IMPORTANT RULES:
-- Fix spelling mistakes (e.g., "TP53 mutaions" → extract "TP53")
-- Handle ambiguous genes (e.g., "BRCA" → pick "BRCA1" as most common)
-- If just cancer type mentioned (e.g., "breast cancer"), leave genes empty
-- For invalid genes (e.g., "FAKEGENEXYZ"), return empty genes list with low confidence
-- Extract ALL genes mentioned (e.g., "TP53 and BRCA1" → ["TP53", "BRCA1"])
-
-Respond ONLY with valid JSON in this exact format:
-{
-    "genes": ["GENE1", "GENE2"],
-    "cancer_types": ["type1"],
-    "query_type": "mutations",
-    "filters": [],
-    "confidence": 8,
-    "reasoning": "brief explanation"
-}
-
-No additional text or explanation outside the JSON."""
+    # Kept deliberately short - it is resent on every call, so each extra
+    # line costs input tokens and time-to-first-token on all providers
+    SYSTEM_PROMPT = """Extract structured data from cancer genomics queries for cBioPortal.
+Rules:
+- Fix gene spelling ("TP53 mutaions" -> "TP53"); extract ALL genes, uppercase.
+- Ambiguous "BRCA" -> "BRCA1". Unknown/fake genes -> empty list, low confidence.
+- Cancer types lowercase ("breast", "lung"). Cancer-only queries leave genes empty.
+- query_type: one of "mutations", "expression", "copy_number", "clinical", "general".
+Respond with valid JSON only:
+{"genes": [], "cancer_types": [], "query_type": "mutations", "filters": [], "confidence": 8, "reasoning": "brief"}"""
+
+    BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+You will receive several numbered queries. Respond with a JSON array holding
+one result object per query, in input order, and nothing else."""
+
+    # Anthropic system block marked cacheable: the static prompt is read
+    # from the provider-side prefix cache instead of being re-billed per
+    # call. OpenAI applies prefix caching automatically, no opt-in needed.
+    _CLAUDE_SYSTEM = [{
+        "type": "text",
+        "text": SYSTEM_PROMPT,
+        "cache_control": {"type": "ephemeral"}
+    }]
+    _CLAUDE_BATCH_SYSTEM = [{
+        "type": "text",
+        "text": BATCH_SYSTEM_PROMPT,
+        "cache_control": {"type": "ephemeral"}
+    }]
 
     def __init__(self):
         """Initialize LLM parser"""
         self.provider = Config.LLM_PROVIDER
-        
-        if self.provider == "anthropic" and ANTHROPIC_AVAILABLE and Config.ANTHROPIC_API_KEY:
+        self.async_client = None
+
+        # Groq first: it is the preferred parser backend when configured
+        if self.provider == "groq" and GROQ_AVAILABLE and Config.GROQ_API_KEY:
+            self.client = Groq(api_key=Config.GROQ_API_KEY)
+            self.async_client = AsyncGroq(api_key=Config.GROQ_API_KEY)
+            self.model = Config.PARSER_MODEL or Config.GROQ_MODEL
+        elif self.provider == "anthropic" and ANTHROPIC_AVAILABLE and Config.ANTHROPIC_API_KEY:
             self.client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY)
-            self.model = Config.CLAUDE_MODEL
+            self.async_client = anthropic.AsyncAnthropic(api_key=Config.ANTHROPIC_API_KEY)
+            self.model = Config.PARSER_MODEL or Config.CLAUDE_MODEL
         elif self.provider == "openai" and OPENAI_AVAILABLE and Config.OPENAI_API_KEY:
             self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
-            self.model = Config.OPENAI_MODEL
+            self.async_client = openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY)
+            self.model = Config.PARSER_MODEL or Config.OPENAI_MODEL
         elif self.provider == "gemini" and GEMINI_AVAILABLE and Config.GEMINI_API_KEY:
             genai.configure(api_key=Config.GEMINI_API_KEY)
-            self.client = genai.GenerativeModel(Config.GEMINI_MODEL)
-            self.model = Config.GEMINI_MODEL
-        elif self.provider == "groq" and GROQ_AVAILABLE and Config.GROQ_API_KEY:
-            self.client = Groq(api_key=Config.GROQ_API_KEY)
-            self.model = Config.GROQ_MODEL
+            self.model = Config.PARSER_MODEL or Config.GEMINI_MODEL
+            self.client = genai.GenerativeModel(self.model)
+            self.async_client = self.client  # same object, async via generate_content_async
         elif self.provider == "ollama":
             # Ollama runs locally - no API key needed!
             self.client = "ollama"
+            self.async_client = "ollama"
             self.model = Config.OLLAMA_MODEL
             self.base_url = Config.OLLAMA_BASE_URL
         else:
             self.client = None
             print("[WARNING] No LLM configured. Will use pattern matching fallback.")
-    
+
+        # Resolve the provider branch once instead of on every parse call
+        self._parse_impl = {
+            "anthropic": self._parse_with_claude,
+            "openai": self._parse_with_openai,
+            "gemini": self._parse_with_gemini,
+            "groq": self._parse_with_groq,
+            "ollama": self._parse_with_ollama,
+        }.get(self.provider)
+        self._aparse_impl = {
+            "anthropic": self._aparse_with_claude,
+            "openai": self._aparse_with_openai,
+            "gemini": self._aparse_with_gemini,
+            "groq": self._aparse_with_groq,
+            "ollama": self._aparse_with_ollama,
+        }.get(self.provider)
+
+        # Wall-clock seconds per LLM call, for latency_stats()
+        self._latencies: List[float] = []
+
+        self._warmed = False
+        if self.client is not None:
+            # Open the TLS connection in the background so the first real
+            # parse_query doesn't pay the handshake on top of the request
+            threading.Thread(target=self._warmup, daemon=True).start()
+
+    def _warmup(self):
+        """Pre-establish the provider connection with the cheapest call available"""
+        if self._warmed:
+            return
+        try:
+            if self.provider in ("openai", "groq", "anthropic"):
+                self.client.models.list()
+            elif self.provider == "ollama":
+                _get_ollama_client().get(f"{self.base_url}/api/tags")
+            # Gemini's SDK holds no persistent connection worth warming
+            self._warmed = True
+        except Exception:
+            # Warmup is best-effort; real calls will connect normally
+            pass
+
     def parse_query(self, user_query: str) -> Dict[str, Any]:
         """
         Parse a natural language query using LLM
@@ -109,42 +266,103 @@ No additional text or explanation outside the JSON."""
         Returns:
             Dictionary with structured query information
         """
-        if not self.client:
+        fast = _fast_parse(user_query)
+        if fast is not None:
+            return fast
+
+        if not self.client or self._parse_impl is None:
             return self._fallback_parse(user_query)
-        
+
+        cache_key = self._cache_key(user_query)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        t0 = perf_counter()
         try:
-            if self.provider == "anthropic":
-                return self._parse_with_claude(user_query)
-            elif self.provider == "openai":
-                return self._parse_with_openai(user_query)
-            elif self.provider == "gemini":
-                return self._parse_with_gemini(user_query)
-            elif self.provider == "groq":
-                return self._parse_with_groq(user_query)
-            elif self.provider == "ollama":
-                return self._parse_with_ollama(user_query)
+            result = self._parse_impl(user_query)
         except Exception as e:
             print(f"[ERROR] LLM parsing failed: {e}")
             return self._fallback_parse(user_query)
+        self._latencies.append(perf_counter() - t0)
+
+        if not result.get("fallback_used"):
+            _cache.set(cache_key, result)
+        return result
     
+    async def aparse_query(self, user_query: str) -> Dict[str, Any]:
+        """
+        Async variant of parse_query for concurrent fan-out
+
+        Args:
+            user_query: User's natural language query
+
+        Returns:
+            Dictionary with structured query information
+        """
+        fast = _fast_parse(user_query)
+        if fast is not None:
+            return fast
+
+        if not self.async_client or self._aparse_impl is None:
+            return self._fallback_parse(user_query)
+
+        cache_key = self._cache_key(user_query)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        t0 = perf_counter()
+        try:
+            result = await self._aparse_impl(user_query)
+        except Exception as e:
+            print(f"[ERROR] LLM parsing failed: {e}")
+            return self._fallback_parse(user_query)
+        self._latencies.append(perf_counter() - t0)
+
+        if not result.get("fallback_used"):
+            _cache.set(cache_key, result)
+        return result
+
+    def latency_stats(self) -> Dict[str, float]:
+        """P50/P95/P99 of recorded LLM call latencies, in milliseconds"""
+        if len(self._latencies) < 2:
+            only = self._latencies[0] * 1000 if self._latencies else 0.0
+            return {"count": len(self._latencies), "p50": only, "p95": only, "p99": only}
+
+        quantiles = statistics.quantiles(self._latencies, n=100)
+        return {
+            "count": len(self._latencies),
+            "p50": quantiles[49] * 1000,
+            "p95": quantiles[94] * 1000,
+            "p99": quantiles[98] * 1000,
+        }
+
+    def _cache_key(self, user_query: str) -> str:
+        """Cache key scoped to provider + model so switching either misses"""
+        raw = f"{self.provider}|{self.model}|{user_query.strip().lower()}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
     def _parse_with_claude(self, user_query: str) -> Dict[str, Any]:
-        """Parse query using Claude"""
-        message = self.client.messages.create(
+        """Parse query using Claude (streamed, stops once the JSON closes)"""
+        buf = []
+        with self.client.messages.stream(
             model=self.model,
-            max_tokens=1024,
+            max_tokens=256,
+            system=self._CLAUDE_SYSTEM,
             messages=[
-                {
-                    "role": "user",
-                    "content": f"{self.SYSTEM_PROMPT}\n\nUser query: \"{user_query}\""
-                }
+                {"role": "user", "content": f"User query: \"{user_query}\""}
             ]
-        )
-        
-        response_text = message.content[0].text
-        return self._parse_llm_response(response_text)
+        ) as stream:
+            for text in stream.text_stream:
+                buf.append(text)
+                if _json_complete("".join(buf)):
+                    break
+
+        return self._parse_llm_response("".join(buf))
     
     def _parse_with_openai(self, user_query: str) -> Dict[str, Any]:
-        """Parse query using OpenAI"""
+        """Parse query using OpenAI (streamed, stops once the JSON closes)"""
         response = self.client.chat.completions.create(
             model=self.model,
             messages=[
@@ -152,16 +370,28 @@ No additional text or explanation outside the JSON."""
                 {"role": "user", "content": f"User query: \"{user_query}\""}
             ],
             temperature=0.3,
-            max_tokens=1024
+            max_tokens=256,
+            response_format={"type": "json_object"},
+            stream=True
         )
-        
-        response_text = response.choices[0].message.content
-        return self._parse_llm_response(response_text)
+
+        buf = []
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                buf.append(chunk.choices[0].delta.content)
+                if _json_complete("".join(buf)):
+                    response.close()
+                    break
+
+        return self._parse_llm_response("".join(buf))
     
     def _parse_with_gemini(self, user_query: str) -> Dict[str, Any]:
         """Parse query using Google Gemini"""
         full_prompt = f"{self.SYSTEM_PROMPT}\n\nUser Query: {user_query}"
-        response = self.client.generate_content(full_prompt)
+        response = self.client.generate_content(
+            full_prompt,
+            generation_config={"response_mime_type": "application/json"}
+        )
         response_text = response.text
         return self._parse_llm_response(response_text)
     
@@ -174,61 +404,206 @@ No additional text or explanation outside the JSON."""
                 {"role": "user", "content": user_query}
             ],
             temperature=0.3,
-            max_tokens=500
+            max_tokens=256,
+            response_format={"type": "json_object"}
         )
         response_text = response.choices[0].message.content
         return self._parse_llm_response(response_text)
     
     def _parse_with_ollama(self, user_query: str) -> Dict[str, Any]:
         """Parse query using Ollama (local LLM)"""
-        import requests
-        
         full_prompt = f"{self.SYSTEM_PROMPT}\n\nUser Query: {user_query}"
-        
-        response = requests.post(
+
+        response = _get_ollama_client().post(
             f"{self.base_url}/api/generate",
             json={
                 "model": self.model,
                 "prompt": full_prompt,
                 "stream": False
-            },
-            timeout=30
+            }
         )
         response.raise_for_status()
         response_text = response.json()["response"]
         return self._parse_llm_response(response_text)
     
+    async def _aparse_with_claude(self, user_query: str) -> Dict[str, Any]:
+        """Parse query using Claude (async)"""
+        message = await self.async_client.messages.create(
+            model=self.model,
+            max_tokens=256,
+            system=self._CLAUDE_SYSTEM,
+            messages=[
+                {"role": "user", "content": f"User query: \"{user_query}\""}
+            ]
+        )
+
+        response_text = message.content[0].text
+        return self._parse_llm_response(response_text)
+
+    async def _aparse_with_openai(self, user_query: str) -> Dict[str, Any]:
+        """Parse query using OpenAI (async)"""
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": f"User query: \"{user_query}\""}
+            ],
+            temperature=0.3,
+            max_tokens=256,
+            response_format={"type": "json_object"}
+        )
+
+        response_text = response.choices[0].message.content
+        return self._parse_llm_response(response_text)
+
+    async def _aparse_with_gemini(self, user_query: str) -> Dict[str, Any]:
+        """Parse query using Google Gemini (async)"""
+        full_prompt = f"{self.SYSTEM_PROMPT}\n\nUser Query: {user_query}"
+        response = await self.async_client.generate_content_async(
+            full_prompt,
+            generation_config={"response_mime_type": "application/json"}
+        )
+        response_text = response.text
+        return self._parse_llm_response(response_text)
+
+    async def _aparse_with_groq(self, user_query: str) -> Dict[str, Any]:
+        """Parse query using Groq (async)"""
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": user_query}
+            ],
+            temperature=0.3,
+            max_tokens=256,
+            response_format={"type": "json_object"}
+        )
+        response_text = response.choices[0].message.content
+        return self._parse_llm_response(response_text)
+
+    async def _aparse_with_ollama(self, user_query: str) -> Dict[str, Any]:
+        """Parse query using Ollama (async)"""
+        full_prompt = f"{self.SYSTEM_PROMPT}\n\nUser Query: {user_query}"
+
+        response = await _get_ollama_async_client().post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": self.model,
+                "prompt": full_prompt,
+                "stream": False
+            }
+        )
+        response.raise_for_status()
+        response_text = response.json()["response"]
+        return self._parse_llm_response(response_text)
+
     def _parse_llm_response(self, response_text: str) -> Dict[str, Any]:
         """Parse and validate LLM JSON response"""
         try:
-            # Extract JSON from response (handle markdown code blocks)
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            parsed = json.loads(response_text.strip())
-            
-            # Validate required fields
-            required_fields = ["genes", "cancer_types", "query_type", "confidence"]
-            for field in required_fields:
-                if field not in parsed:
-                    parsed[field] = [] if field != "confidence" else 5
-            
-            # Ensure proper types
-            parsed["genes"] = [g.upper() for g in parsed.get("genes", [])]
-            parsed["cancer_types"] = [c.lower() for c in parsed.get("cancer_types", [])]
-            parsed["query_type"] = parsed.get("query_type", "general").lower()
-            parsed["confidence"] = float(parsed.get("confidence", 5))
-            parsed["filters"] = parsed.get("filters", [])
-            
-            return parsed
-            
-        except json.JSONDecodeError as e:
+            # OpenAI/Groq/Gemini run in JSON mode and return bare JSON.
+            # Claude and Ollama can still fence it, so strip only that case.
+            response_text = response_text.strip()
+            if response_text.startswith("```"):
+                response_text = response_text.strip("`")
+                if response_text.startswith("json"):
+                    response_text = response_text[4:]
+
+            response_text = response_text.strip()
+            raw = orjson.loads(response_text) if ORJSON_AVAILABLE else json.loads(response_text)
+            return self._normalize_parsed(raw)
+
+        except (ValueError, TypeError) as e:
             print(f"[ERROR] Failed to parse LLM response as JSON: {e}")
             print(f"Response was: {response_text}")
             return self._fallback_parse("")
     
+    def _normalize_parsed(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize one raw result dict through ParsedQuery defaults"""
+        parsed = ParsedQuery(
+            genes=[g.upper() for g in raw.get("genes") or []],
+            cancer_types=[c.lower() for c in raw.get("cancer_types") or []],
+            query_type=(raw.get("query_type") or "general").lower(),
+            confidence=float(raw.get("confidence", 5)),
+            filters=raw.get("filters") or [],
+            reasoning=raw.get("reasoning") or ""
+        )
+        return asdict(parsed)
+
+    async def aparse_queries_batch(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Parse several queries in one LLM call
+
+        The system prompt is sent once for the whole batch instead of once
+        per query, and N-1 network round trips disappear. Falls back to
+        individual aparse_query calls if the batch reply is malformed.
+        """
+        if not queries:
+            return []
+        if not self.async_client or self._aparse_impl is None:
+            return [self._fallback_parse(q) for q in queries]
+
+        numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(queries, 1))
+        try:
+            t0 = perf_counter()
+            text = (await self._acomplete_batch(f"Queries:\n{numbered}")).strip()
+            self._latencies.append(perf_counter() - t0)
+            if text.startswith("```"):
+                text = text.strip("`")
+                if text.startswith("json"):
+                    text = text[4:]
+            raw = orjson.loads(text) if ORJSON_AVAILABLE else json.loads(text)
+            if isinstance(raw, list) and len(raw) == len(queries):
+                return [self._normalize_parsed(item) for item in raw]
+            print(f"[WARNING] Batch reply had {len(raw) if isinstance(raw, list) else 'no'} items for {len(queries)} queries")
+        except Exception as e:
+            print(f"[ERROR] Batch LLM parsing failed: {e}")
+
+        return list(await asyncio.gather(*(self.aparse_query(q) for q in queries)))
+
+    async def _acomplete_batch(self, user_content: str) -> str:
+        """Raw completion text for a batch prompt from the configured provider"""
+        if self.provider == "anthropic":
+            message = await self.async_client.messages.create(
+                model=self.model,
+                max_tokens=2048,
+                system=self._CLAUDE_BATCH_SYSTEM,
+                messages=[
+                    {"role": "user", "content": user_content}
+                ]
+            )
+            return message.content[0].text
+        if self.provider in ("openai", "groq"):
+            # No json_object mode here - it forces a top-level object and
+            # the batch reply is a top-level array
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_content}
+                ],
+                temperature=0.3,
+                max_tokens=2048
+            )
+            return response.choices[0].message.content
+        if self.provider == "gemini":
+            response = await self.async_client.generate_content_async(
+                f"{self.BATCH_SYSTEM_PROMPT}\n\n{user_content}",
+                generation_config={"response_mime_type": "application/json"}
+            )
+            return response.text
+        if self.provider == "ollama":
+            response = await _get_ollama_async_client().post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": f"{self.BATCH_SYSTEM_PROMPT}\n\n{user_content}",
+                    "stream": False
+                }
+            )
+            response.raise_for_status()
+            return response.json()["response"]
+        raise RuntimeError(f"No batch support for provider {self.provider!r}")
+
     def _fallback_parse(self, user_query: str) -> Dict[str, Any]:
         """Fallback pattern matching when LLM is unavailable"""
         return {
@@ -244,14 +619,14 @@ No additional text or explanation outside the JSON."""
     def validate_genes(self, genes: List[str], known_genes: List[str]) -> tuple[List[str], List[str]]:
         """
         Validate gene names against known gene list
-        
+
         Returns:
             (valid_genes, invalid_genes)
         """
-        known_genes_upper = [g.upper() for g in known_genes]
-        valid = [g for g in genes if g.upper() in known_genes_upper]
-        invalid = [g for g in genes if g.upper() not in known_genes_upper]
-        
+        known_set = _known_genes_set(tuple(known_genes))
+        valid = [g for g in genes if g.upper() in known_set]
+        invalid = [g for g in genes if g.upper() not in known_set]
+
         return valid, invalid
 
 
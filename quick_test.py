@@ -2,12 +2,12 @@
 Quick test of LLM parser
 """
 
-from llm_parser import LLMQueryParser
-from gene_validator import GeneValidator
+from llm_parser import get_parser
+from gene_validator import get_validator
 
 print("Initializing LLM Parser...")
-parser = LLMQueryParser()
-validator = GeneValidator()
+parser = get_parser()
+validator = get_validator()
 
 print("\n" + "="*60)
 print("Testing LLM Query Parser")
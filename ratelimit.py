@@ -0,0 +1,51 @@
+"""
+Token-bucket rate limiting for the test scripts
+Author: Aashish Kharel
+GSoC 2026
+
+A fixed sleep after every request puts an n*delay floor under a run even
+when most calls are cache hits or regex fast-path parses. A token bucket
+only waits when the quota is actually spent, and tokens can be refunded
+when a call turns out not to hit the LLM at all.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Sync token bucket - acquire() blocks only when the bucket is empty"""
+
+    def __init__(self, capacity: int, refill_rate: float):
+        self.capacity = float(capacity)
+        self.refill_rate = refill_rate  # tokens per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping just long enough if none are left"""
+        self._refill()
+        if self.tokens < 1.0:
+            time.sleep((1.0 - self.tokens) / self.refill_rate)
+            self._refill()
+        self.tokens -= 1.0
+
+    def refund(self):
+        """Give a token back (the call never reached the rate-limited API)"""
+        self.tokens = min(self.capacity, self.tokens + 1.0)
+
+
+class AsyncTokenBucket(TokenBucket):
+    """Async variant - awaits instead of blocking the event loop"""
+
+    async def acquire(self):
+        self._refill()
+        if self.tokens < 1.0:
+            await asyncio.sleep((1.0 - self.tokens) / self.refill_rate)
+            self._refill()
+        self.tokens -= 1.0
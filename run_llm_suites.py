@@ -0,0 +1,58 @@
+"""
+Run the three LLM test suites in parallel processes
+Author: Aashish Kharel - GSoC 2026
+
+Launching test_llm_parser, test_llm_comprehensive and test_llm_accuracy
+back-to-back serializes roughly 3x the work; each suite is its own process
+here, so wall time is the slowest suite instead of the sum. Output is
+buffered per suite and printed in order once everything finishes.
+
+Each suite writes its own results file, and LLM_SUITE_SHARDS tells the
+suites to split the shared provider quota between themselves so the
+parallel run doesn't multiply the request rate into 429s.
+"""
+
+import asyncio
+import os
+import sys
+
+SUITES = (
+    "test_llm_parser.py",
+    "test_llm_comprehensive.py",
+    "test_llm_accuracy.py",
+)
+
+
+async def run_suite(script: str) -> tuple[str, int, bytes]:
+    """Run one suite as a subprocess, capturing its combined output"""
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, script,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env=dict(os.environ, LLM_SUITE_SHARDS=str(len(SUITES))),
+    )
+    output, _ = await proc.communicate()
+    return script, proc.returncode, output
+
+
+async def main() -> int:
+    results = await asyncio.gather(*(run_suite(script) for script in SUITES))
+
+    failed = 0
+    for script, returncode, output in results:
+        print("=" * 80)
+        print(f"{script} (exit code {returncode})")
+        print("=" * 80)
+        sys.stdout.write(output.decode(errors="replace"))
+        print()
+        if returncode != 0:
+            failed += 1
+
+    print("=" * 80)
+    print(f"Suites: {len(SUITES) - failed}/{len(SUITES)} passed")
+    print("=" * 80)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -5,20 +5,27 @@ Author: Aashish Kharel
 GSoC 2026
 """
 
+import asyncio
 import json
-import time
 from datetime import datetime
 from pathlib import Path
-from llm_parser import LLMQueryParser
-from gene_validator import GeneValidator
+from llm_parser import get_parser
+from gene_validator import get_validator
+
+# Faster libuv event loop where available (not on Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 print("="*70)
 print(" LLM PARSER COMPREHENSIVE TEST SUITE")
 print("="*70)
 
 # Initialize
-parser = LLMQueryParser()
-validator = GeneValidator()
+parser = get_parser()
+validator = get_validator()
 
 # Load test queries
 test_file = Path("tests/test_queries.json")
@@ -42,62 +49,59 @@ for category in ["simple_queries", "medium_queries", "complex_queries"]:
 print(f"\nTotal Tests: {len(all_tests)}")
 print(f"Starting at: {datetime.now().strftime('%H:%M:%S')}\n")
 
-# Run tests
-results = []
-passed = 0
-failed = 0
+# Run tests in batches - each batch is one LLM call (the system prompt is
+# amortized across the whole batch), and the semaphore bounds in-flight
+# batches so we stay under provider rate limits without per-call sleeps
+MAX_CONCURRENCY = 4
+BATCH_SIZE = 10
+semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
 
-for test in all_tests:
+def evaluate(test, result):
+    """Score one parse result and print its line"""
     test_id = test["id"]
     query = test["query"]
-    category = test["category"]
-    
+
+    # Extract data
+    genes = result.get("genes", [])
+    cancer_types = result.get("cancer_types", [])
+    query_type = result.get("query_type", "unknown")
+    confidence = result.get("confidence", 0)
+
+    # Consider it passed if we got a reasonable parse
+    test_passed = confidence >= 5 and (genes or cancer_types or query_type != "unknown")
+    status = "[OK]" if test_passed else "[FAIL]"
+
     print(f"[Test #{test_id}] {query}")
-    
-    try:
-        result = parser.parse_query(query)
-        
-        # Extract data
-        genes = result.get("genes", [])
-        cancer_types = result.get("cancer_types", [])
-        query_type = result.get("query_type", "unknown")
-        confidence = result.get("confidence", 0)
-        
-        # Consider it passed if we got a reasonable parse
-        test_passed = confidence >= 5 and (genes or cancer_types or query_type != "unknown")
-        
-        if test_passed:
-            passed += 1
-            status = "[OK]"
-        else:
-            failed += 1
-            status = "[FAIL]"
-        
-        print(f"  {status} Genes: {genes}, Cancers: {cancer_types}, Confidence: {confidence}/10")
-        
-        results.append({
-            "id": test_id,
-            "category": category,
-            "query": query,
-            "result": result,
-            "passed": test_passed,
-            "confidence": confidence
-        })
-        
-        # Small delay to avoid rate limits
-        time.sleep(0.3)
-        
-    except Exception as e:
-        failed += 1
-        print(f"  [ERROR] {str(e)}")
-        results.append({
-            "id": test_id,
-            "category": category,
-            "query": query,
-            "result": {"error": str(e)},
-            "passed": False,
-            "confidence": 0
-        })
+    print(f"  {status} Genes: {genes}, Cancers: {cancer_types}, Confidence: {confidence}/10")
+
+    return {
+        "id": test_id,
+        "category": test["category"],
+        "query": query,
+        "result": result,
+        "passed": test_passed,
+        "confidence": confidence
+    }
+
+
+async def run_batch(batch):
+    """Parse one batch of tests in a single LLM call"""
+    async with semaphore:
+        parses = await parser.aparse_queries_batch([t["query"] for t in batch])
+    return [evaluate(test, result) for test, result in zip(batch, parses)]
+
+
+async def run_all():
+    """Fan out batches with asyncio.gather, preserving test order"""
+    batches = [all_tests[i:i + BATCH_SIZE] for i in range(0, len(all_tests), BATCH_SIZE)]
+    nested = await asyncio.gather(*(run_batch(batch) for batch in batches))
+    return [result for group in nested for result in group]
+
+
+results = asyncio.run(run_all())
+passed = sum(1 for r in results if r["passed"])
+failed = len(results) - passed
 
 # Calculate stats
 total = len(all_tests)
@@ -117,72 +121,66 @@ for category in ["simple", "medium", "complex"]:
     cat_rate = (cat_passed / cat_total * 100) if cat_total > 0 else 0
     print(f"{category.capitalize():10} {cat_passed}/{cat_total} ({cat_rate:.1f}%)")
 
+latency = parser.latency_stats()
 print(f"\nAverage Confidence: {avg_confidence:.1f}/10")
+print(f"LLM Latency (ms): P50={latency['p50']:.0f} P95={latency['p95']:.0f} P99={latency['p99']:.0f} over {latency['count']} calls")
 print(f"Completed at: {datetime.now().strftime('%H:%M:%S')}")
 
-# Generate markdown report
-report_lines = [
-    "# LLM Parser Test Results",
-    "",
-    f"**Date:** {datetime.now().strftime('%B %d, %Y %H:%M:%S')}",
-    f"**LLM Provider:** OpenAI GPT-4o-mini",
-    f"**Total Tests:** {total}",
-    f"**Passed:** {passed}  ",
-    f"**Failed:** {failed}",
-    f"**Success Rate:** {success_rate:.1f}%",
-    f"**Average Confidence:** {avg_confidence:.1f}/10",
-    "",
-    "---",
-    "",
-    "## Results by Category",
-    ""
-]
-
-for category in ["simple", "medium", "complex"]:
-    cat_results = [r for r in results if r["category"] == category]
-    cat_passed = sum(1 for r in cat_results if r["passed"])
-    cat_total = len(cat_results)
-    cat_rate = (cat_passed / cat_total * 100) if cat_total > 0 else 0
-    
-    report_lines.extend([
-        f"### {category.capitalize()} Queries ({cat_passed}/{cat_total} - {cat_rate:.1f}%)",
-        ""
-    ])
-    
-    for r in cat_results:
-        status_icon = "✓" if r["passed"] else "✗"
-        genes_str = ", ".join(r["result"].get("genes", [])) if "genes" in r["result"] else "ERROR"
-        report_lines.extend([
-            f"**{status_icon} Test #{r['id']}:** {r['query']}  ",
-            f"- Genes: {genes_str}  ",
-            f"- Cancer Types: {', '.join(r['result'].get('cancer_types', []))}  ",
-            f"- Confidence: {r['confidence']}/10  ",
-            ""
-        ])
-
-# Add failed tests detail
-failed_results = [r for r in results if not r["passed"]]
-if failed_results:
-    report_lines.extend([
-        "---",
-        "",
-        f"## Failed Tests ({len(failed_results)})",
-        ""
-    ])
-    
-    for r in failed_results:
-        report_lines.extend([
-            f"### Test #{r['id']}: {r['query']}",
-            f"**Genes:** {r['result'].get('genes', [])}  ",
-            f"**Cancer Types:** {r['result'].get('cancer_types', [])}  ",
-            f"**Confidence:** {r['confidence']}/10  ",
-            ""
-        ])
-
-# Write report
+# Generate markdown report - stream lines straight to the file instead of
+# accumulating a second copy of the report in a list and joining at the end
 report_path = Path("tests/LLM_TEST_RESULTS.md")
 with open(report_path, 'w', encoding='utf-8') as f:
-    f.write("\n".join(report_lines))
+    def emit(line=""):
+        f.write(line + "\n")
+
+    emit("# LLM Parser Test Results")
+    emit()
+    emit(f"**Date:** {datetime.now().strftime('%B %d, %Y %H:%M:%S')}")
+    emit(f"**LLM Provider:** OpenAI GPT-4o-mini")
+    emit(f"**Total Tests:** {total}")
+    emit(f"**Passed:** {passed}  ")
+    emit(f"**Failed:** {failed}")
+    emit(f"**Success Rate:** {success_rate:.1f}%")
+    emit(f"**Average Confidence:** {avg_confidence:.1f}/10")
+    emit(f"**LLM Latency (ms):** P50={latency['p50']:.0f}, P95={latency['p95']:.0f}, P99={latency['p99']:.0f} ({latency['count']} calls)")
+    emit()
+    emit("---")
+    emit()
+    emit("## Results by Category")
+    emit()
+
+    for category in ["simple", "medium", "complex"]:
+        cat_results = [r for r in results if r["category"] == category]
+        cat_passed = sum(1 for r in cat_results if r["passed"])
+        cat_total = len(cat_results)
+        cat_rate = (cat_passed / cat_total * 100) if cat_total > 0 else 0
+
+        emit(f"### {category.capitalize()} Queries ({cat_passed}/{cat_total} - {cat_rate:.1f}%)")
+        emit()
+
+        for r in cat_results:
+            status_icon = "✓" if r["passed"] else "✗"
+            genes_str = ", ".join(r["result"].get("genes", [])) if "genes" in r["result"] else "ERROR"
+            emit(f"**{status_icon} Test #{r['id']}:** {r['query']}  ")
+            emit(f"- Genes: {genes_str}  ")
+            emit(f"- Cancer Types: {', '.join(r['result'].get('cancer_types', []))}  ")
+            emit(f"- Confidence: {r['confidence']}/10  ")
+            emit()
+
+    # Add failed tests detail
+    failed_results = [r for r in results if not r["passed"]]
+    if failed_results:
+        emit("---")
+        emit()
+        emit(f"## Failed Tests ({len(failed_results)})")
+        emit()
+
+        for r in failed_results:
+            emit(f"### Test #{r['id']}: {r['query']}")
+            emit(f"**Genes:** {r['result'].get('genes', [])}  ")
+            emit(f"**Cancer Types:** {r['result'].get('cancer_types', [])}  ")
+            emit(f"**Confidence:** {r['confidence']}/10  ")
+            emit()
 
 # Save JSON
 json_path = Path("tests/llm_test_results.json")
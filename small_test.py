@@ -1,57 +1,80 @@
 """
 Small LLM Test - Respects Free Tier Rate Limits
-Only runs 5 queries with delays
+Only runs 5 queries, paced by a token bucket instead of fixed sleeps
 """
 
-import time
-from llm_parser import LLMQueryParser
-from gene_validator import GeneValidator
+import asyncio
+from llm_parser import get_parser
+from gene_validator import get_validator
+
+# Faster libuv event loop where available (not on Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+# Token-bucket pacing: calls proceed at exactly the allowed rate with no
+# dead time, unlike the old fixed 2s sleep between every query
+try:
+    from aiolimiter import AsyncLimiter
+    LIMITER_AVAILABLE = True
+except ImportError:
+    LIMITER_AVAILABLE = False
 
 print("="*60)
 print("SMALL LLM TEST (Free Tier Friendly)")
 print("="*60)
-print("\nRunning only 5 queries with delays to respect rate limits...\n")
+print("\nRunning only 5 queries, paced to respect rate limits...\n")
 
-parser = LLMQueryParser()
-validator = GeneValidator()
+parser = get_parser()
+validator = get_validator()
 
 # Just 5 carefully selected queries
 test_queries = [
     "TP53 mutations in breast cancer",
-    "EGFR and ALK in lung cancer", 
+    "EGFR and ALK in lung cancer",
     "BRCA1 and BRCA2 in ovarian cancer",
     "KRAS in colorectal cancer",
     "PIK3CA mutations"
 ]
 
-results = []
-for i, query in enumerate(test_queries, 1):
-    print(f"[{i}/5] Testing: \"{query}\"")
-    
-    try:
-        result = parser.parse_query(query)
-        
-        if result and "genes" in result:
-            genes = result.get("genes", [])
-            cancer_types = result.get("cancer_types", [])
-            confidence = result.get("confidence", 0)
-            
-            print(f"  ✓ Genes: {genes}")
-            print(f"  ✓ Cancer: {cancer_types}")
-            print(f"  ✓ Confidence: {confidence}/10")
-            results.append("PASS")
-        else:
-            print(f"  ✗ Parse failed")
-            results.append("FAIL")
-            
-    except Exception as e:
-        print(f"  ✗ Error: {str(e)[:100]}")
-        results.append("ERROR")
-    
-    # Wait 2 seconds between calls to respect rate limits
-    if i < len(test_queries):
-        print("  (waiting 2 seconds...)\n")
-        time.sleep(2)
+
+async def run_tests():
+    limiter = AsyncLimiter(30, 60) if LIMITER_AVAILABLE else None  # 30 req/min
+    results = []
+
+    for i, query in enumerate(test_queries, 1):
+        print(f"[{i}/5] Testing: \"{query}\"")
+
+        try:
+            if limiter is not None:
+                async with limiter:
+                    result = await parser.aparse_query(query)
+            else:
+                result = await parser.aparse_query(query)
+
+            if result and "genes" in result:
+                genes = result.get("genes", [])
+                cancer_types = result.get("cancer_types", [])
+                confidence = result.get("confidence", 0)
+
+                print(f"  ✓ Genes: {genes}")
+                print(f"  ✓ Cancer: {cancer_types}")
+                print(f"  ✓ Confidence: {confidence}/10")
+                results.append("PASS")
+            else:
+                print(f"  ✗ Parse failed")
+                results.append("FAIL")
+
+        except Exception as e:
+            print(f"  ✗ Error: {str(e)[:100]}")
+            results.append("ERROR")
+
+    return results
+
+
+results = asyncio.run(run_tests())
 
 print("\n" + "="*60)
 print("RESULTS SUMMARY")
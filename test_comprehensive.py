@@ -5,10 +5,39 @@ Tests real API integration with multiple genes and cancer types
 import asyncio
 import httpx
 
+# aiohttp handles high request concurrency better than httpx (which can
+# serialize under load); httpx remains the fallback
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
 API_URL = "http://localhost:8000"
 
+
+def _make_client():
+    """Pooled HTTP client - aiohttp when available, httpx otherwise"""
+    if AIOHTTP_AVAILABLE:
+        return aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=30),
+            connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=30)
+        )
+    return httpx.AsyncClient(timeout=30.0)
+
+
+async def _get_json(client, query_text):
+    """GET /query, returning (status_code, json_or_None)"""
+    if AIOHTTP_AVAILABLE:
+        async with client.get(f"{API_URL}/query", params={"text": query_text}) as r:
+            return r.status, (await r.json() if r.status == 200 else None)
+    r = await client.get(f"{API_URL}/query?text={query_text}")
+    return r.status_code, (r.json() if r.status_code == 200 else None)
+
+
 async def test_all_queries():
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    client = _make_client()
+    try:
         print("=" * 70)
         print("  cBioPortal AI Assistant - COMPREHENSIVE API TEST")
         print("=" * 70)
@@ -23,77 +52,72 @@ async def test_all_queries():
             ("BRAF mutations", "BRAF", "General"),
         ]
         
-        results = []
-        
-        for query_text, gene, context in test_queries:
-            print(f"[TEST] Testing: {query_text}")
-            print(f"   Gene: {gene} | Context: {context}")
-            
+        # Queries are independent - fan out with a bounded semaphore and
+        # buffer each test's output so results still print in order
+        sem = asyncio.Semaphore(5)
+
+        async def run_one(query_text, gene, context):
+            lines = [f"[TEST] Testing: {query_text}",
+                     f"   Gene: {gene} | Context: {context}"]
+
             try:
-                response = await client.get(f"{API_URL}/query?text={query_text}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
+                async with sem:
+                    status_code, data = await _get_json(client, query_text)
+
+                if status_code == 200:
                     if data.get("status") == "success":
                         source = data.get("source", "Unknown")
                         total = data.get("total_in_study", 0)
                         showing = data.get("count", 0)
                         study = data.get("study_id", "N/A")
-                        
+
                         # Check if using real API data
                         is_api_data = "API" in source
                         status_icon = "[OK]" if is_api_data else "[WARN]"
-                        
-                        print(f"   {status_icon} Status: SUCCESS")
-                        print(f"   Source: {source}")
-                        print(f"   Study: {study}")
-                        print(f"   Mutations: {showing} shown (of {total} total)")
-                        
+
+                        lines.append(f"   {status_icon} Status: SUCCESS")
+                        lines.append(f"   Source: {source}")
+                        lines.append(f"   Study: {study}")
+                        lines.append(f"   Mutations: {showing} shown (of {total} total)")
+
                         # Show sample mutations
                         mutations = data.get("mutations", [])
                         if mutations:
-                            print(f"   Sample mutations:")
+                            lines.append(f"   Sample mutations:")
                             for mut in mutations[:3]:
-                                print(f"      - {mut['sample_id']}: {mut['mutation']} ({mut['type']})")
-                        
-                        results.append({
+                                lines.append(f"      - {mut['sample_id']}: {mut['mutation']} ({mut['type']})")
+
+                        return lines, {
                             "query": query_text,
                             "gene": gene,
                             "success": True,
                             "api_data": is_api_data,
                             "mutations": total
-                        })
+                        }
                     else:
-                        print(f"   [FAIL] Query failed: {data.get('message', 'Unknown error')}")
-                        results.append({
-                            "query": query_text,
-                            "gene": gene,
-                            "success": False,
-                            "api_data": False,
-                            "mutations": 0
-                        })
+                        lines.append(f"   [FAIL] Query failed: {data.get('message', 'Unknown error')}")
                 else:
-                    print(f"   ❌ HTTP Error: {response.status_code}")
-                    results.append({
-                        "query": query_text,
-                        "gene": gene,
-                        "success": False,
-                        "api_data": False,
-                        "mutations": 0
-                    })
-                    
+                    lines.append(f"   ❌ HTTP Error: {status_code}")
+
             except Exception as e:
-                print(f"   [FAIL] Exception: {e}")
-                results.append({
-                    "query": query_text,
-                    "gene": gene,
-                    "success": False,
-                    "api_data": False,
-                    "mutations": 0
-                })
-            
+                lines.append(f"   [FAIL] Exception: {e}")
+
+            return lines, {
+                "query": query_text,
+                "gene": gene,
+                "success": False,
+                "api_data": False,
+                "mutations": 0
+            }
+
+        outcomes = await asyncio.gather(*[run_one(q, g, c) for q, g, c in test_queries])
+
+        results = []
+        for lines, result in outcomes:
+            for line in lines:
+                print(line)
             print()
+            results.append(result)
         
         # Summary
         print("=" * 70)
@@ -101,10 +125,13 @@ async def test_all_queries():
         print("=" * 70)
         print()
         
+        # One pass over results instead of a sum() per statistic
         total_tests = len(results)
-        successful = sum(1 for r in results if r["success"])
-        api_data_count = sum(1 for r in results if r["api_data"])
-        total_mutations = sum(r["mutations"] for r in results)
+        successful = api_data_count = total_mutations = 0
+        for r in results:
+            successful += r["success"]
+            api_data_count += r["api_data"]
+            total_mutations += r["mutations"]
         
         print(f"Total Queries Tested: {total_tests}")
         print(f"Successful: {successful} [OK]")
@@ -122,8 +149,13 @@ async def test_all_queries():
         
         print()
         print("=" * 70)
-        
+
         return results
+    finally:
+        if AIOHTTP_AVAILABLE:
+            await client.close()
+        else:
+            await client.aclose()
 
 
 if __name__ == "__main__":
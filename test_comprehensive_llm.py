@@ -6,13 +6,49 @@ Date: January 13, 2026
 """
 
 import asyncio
+import io
+import sqlite3
+import sys
+import time
 import httpx
 from typing import Dict, List, Tuple
 from datetime import datetime
+from pathlib import Path
 import json
 
+from ratelimit import AsyncTokenBucket
+
+# orjson serializes the results file much faster (falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# aiohttp sustains concurrent requests better than httpx; optional, with
+# httpx as the fallback
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
 BASE_URL = "http://localhost:8000"
 
+# Per-test outcomes persist here so --rerun-failed can retry only the
+# failures instead of burning the whole rate-limit budget again
+STATE_DB = "test_state.db"
+
+
+def _state_conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(STATE_DB)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS results "
+        "(query TEXT PRIMARY KEY, passed INT, result TEXT, ts REAL)"
+    )
+    conn.commit()
+    return conn
+
 # ============================================================================
 # TEST CASES - Simple, Medium, Complex
 # ============================================================================
@@ -55,10 +91,7 @@ COMPLEX_QUERIES = [
     {
         "query": "KRAS and BRAF in colorectal cancer samples",
         "expected": {"genes": ["KRAS", "BRAF"], "cancer_type": "colorectal"}
-    }
-]
-
-COMPLEX_QUERIES = [
+    },
     {
         "query": "What are the most common mutations in HER2-positive breast cancer?",
         "expected": {"cancer_type": "breast"}
@@ -75,9 +108,98 @@ EDGE_CASES = [
     {"query": "TP53", "expected": {"genes": ["TP53"]}}
 ]
 
+# A second COMPLEX_QUERIES assignment once silently replaced the first and
+# dropped three queries from every run; fail loudly if a duplicate sneaks in
+assert len({tc["query"] for tc in COMPLEX_QUERIES}) == len(COMPLEX_QUERIES), \
+    "duplicate query in COMPLEX_QUERIES"
+
+
+# ============================================================================
+# PRECOMPILED EVALUATION CHECKS
+# ============================================================================
+# The branch pattern in result evaluation ("genes" in expected, isinstance
+# list checks, ...) is identical every time a test case runs, so it is
+# resolved once at import into a list of closures per test case. Each check
+# takes the actual response and returns (passed, detail).
+
+def _error_check(actual):
+    if actual.get("status") == "error":
+        return True, "Correctly handled invalid query"
+    return True, "Query handled (acceptable)"
+
+
+def _gene_check(expected_genes):
+    def check(actual):
+        actual_gene = actual.get("gene")
+        if actual_gene in expected_genes:
+            return True, f"✓ Gene: {actual_gene}"
+        return False, f"✗ Gene: Expected {expected_genes}, got {actual_gene}"
+    return check
+
+
+def _cancer_check(expected_cancer):
+    accepted = set(expected_cancer) if isinstance(expected_cancer, list) else {expected_cancer}
+
+    def check(actual):
+        actual_cancer = actual.get("parsed_query", {}).get("cancer_type")
+        if actual_cancer in accepted:
+            return True, f"✓ Cancer type: {actual_cancer}"
+        if actual_cancer is None:
+            return True, "⚠ Cancer type not detected"
+        # Informational only - cancer mismatches never fail a test
+        return True, f"✗ Cancer type: Expected {expected_cancer}, got {actual_cancer}"
+    return check
+
+
+def _status_check(actual):
+    if actual.get("status") == "success":
+        return True, "✓ Query successful"
+    return False, f"✗ Query failed: {actual.get('message', 'Unknown error')}"
+
+
+def _compile_checks(expected: Dict) -> List:
+    """Turn an expected-result dict into a list of check closures"""
+    if expected.get("error"):
+        return [_error_check]
+    checks = []
+    if "genes" in expected:
+        checks.append(_gene_check(expected["genes"]))
+    if "cancer_type" in expected:
+        checks.append(_cancer_check(expected["cancer_type"]))
+    checks.append(_status_check)
+    return checks
+
+
+_CHECKS_BY_QUERY = {
+    tc["query"]: _compile_checks(tc["expected"])
+    for cases in (SIMPLE_QUERIES, MEDIUM_QUERIES, COMPLEX_QUERIES, EDGE_CASES)
+    for tc in cases
+}
+
 
 class ComprehensiveTestRunner:
-    def __init__(self):
+    def __init__(self, transport: str = "direct", rerun_failed: bool = False):
+        # "direct" calls backend.main.parse_query in-process - no uvicorn,
+        # httpx or Pydantic overhead per query, and no server to keep
+        # running. "http" exercises the full web layer when that is the
+        # thing under test.
+        self.transport = transport
+        if transport == "direct":
+            from backend.main import parse_query
+            self._parse = parse_query
+        # One pooled client for the whole run - keep-alive skips the TCP/TLS
+        # setup every test_query used to pay with its own AsyncClient
+        self.client = None
+        # Groq free tier: 30 req/min. Tokens are only spent on real
+        # requests, so cache-hit-heavy runs don't inherit a fixed floor
+        self.bucket = AsyncTokenBucket(30, 30 / 60)
+        # With --rerun-failed, previously passing queries are served from
+        # the state database and only failures hit the backend again
+        self.rerun_failed = rerun_failed
+        self._state = _state_conn()
+        # One timestamp for the whole run so the report header, JSON
+        # filename and test_date all name the same instant
+        self.started_at = datetime.now()
         self.results = {
             "simple": [],
             "medium": [],
@@ -90,48 +212,93 @@ class ComprehensiveTestRunner:
             "complex": {"total": 0, "passed": 0, "failed": 0},
             "edge_cases": {"total": 0, "passed": 0, "failed": 0}
         }
-        
+
+    async def __aenter__(self):
+        if self.transport == "http":
+            if AIOHTTP_AVAILABLE:
+                self.client = aiohttp.ClientSession(
+                    base_url=BASE_URL,
+                    timeout=aiohttp.ClientTimeout(total=30),
+                    connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=30)
+                )
+            else:
+                self.client = httpx.AsyncClient(
+                    base_url=BASE_URL,
+                    timeout=30.0,
+                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+                )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.client is not None:
+            if AIOHTTP_AVAILABLE:
+                await self.client.close()
+            else:
+                await self.client.aclose()
+            self.client = None
+        self._state.close()
+
+    async def _get(self, path: str, params: Dict):
+        """GET returning (status_code, headers, json_or_None)"""
+        if AIOHTTP_AVAILABLE:
+            async with self.client.get(path, params=params) as r:
+                body = await r.json() if r.status == 200 else None
+                return r.status, r.headers, body
+        r = await self.client.get(path, params=params)
+        return r.status_code, r.headers, (r.json() if r.status_code == 200 else None)
+
+    async def _post_batch(self, queries: List[str]):
+        """POST /query/batch, returning the parsed list or None on failure"""
+        if AIOHTTP_AVAILABLE:
+            async with self.client.post("/query/batch", json=queries) as r:
+                return await r.json() if r.status == 200 else None
+        r = await self.client.post("/query/batch", json=queries)
+        return r.json() if r.status_code == 200 else None
+
     async def test_query(self, test_case: Dict, category: str) -> Dict:
         """Test a single query"""
         query = test_case["query"]
         expected = test_case["expected"]
-        
+
+        if self.transport == "direct":
+            return await self._test_query_direct(query, expected)
+
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{BASE_URL}/query",
-                    params={"text": query}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Evaluate the result
-                    passed, details = self._evaluate_result(data, expected, query)
-                    
-                    return {
-                        "query": query,
-                        "passed": passed,
-                        "expected": expected,
-                        "actual": {
-                            "gene": data.get("gene"),
-                            "cancer_type": data.get("parsed_query", {}).get("cancer_type"),
-                            "status": data.get("status"),
-                            "llm_used": data.get("parsed_query", {}).get("llm_used", False),
-                            "confidence": data.get("parsed_query", {}).get("confidence", 0)
-                        },
-                        "details": details,
-                        "response": data
-                    }
-                else:
-                    return {
-                        "query": query,
-                        "passed": False,
-                        "expected": expected,
-                        "error": f"HTTP {response.status_code}",
-                        "actual": None
-                    }
-                    
+            status_code, headers, data = await self._get("/query", {"text": query})
+
+            if status_code == 429:
+                # Back off exactly as long as the server asks, then retry once
+                retry_after = float(headers.get("Retry-After", 2.0))
+                await asyncio.sleep(retry_after)
+                status_code, headers, data = await self._get("/query", {"text": query})
+
+            if status_code == 200:
+                # Evaluate the result
+                passed, details = self._evaluate_result(data, expected, query)
+
+                return {
+                    "query": query,
+                    "passed": passed,
+                    "expected": expected,
+                    "actual": {
+                        "gene": data.get("gene"),
+                        "cancer_type": data.get("parsed_query", {}).get("cancer_type"),
+                        "status": data.get("status"),
+                        "llm_used": data.get("parsed_query", {}).get("llm_used", False),
+                        "confidence": data.get("parsed_query", {}).get("confidence", 0)
+                    },
+                    "details": details,
+                    "response": data
+                }
+            else:
+                return {
+                    "query": query,
+                    "passed": False,
+                    "expected": expected,
+                    "error": f"HTTP {status_code}",
+                    "actual": None
+                }
+
         except Exception as e:
             return {
                 "query": query,
@@ -141,92 +308,156 @@ class ComprehensiveTestRunner:
                 "actual": None
             }
     
+    async def _test_query_direct(self, query: str, expected: Dict) -> Dict:
+        """Run one query against parse_query in-process"""
+        try:
+            # parse_query is sync (it may block on an LLM call), so keep it
+            # off the event loop
+            parsed = await asyncio.get_event_loop().run_in_executor(None, self._parse, query)
+            return self._result_from_parsed(query, expected, parsed)
+        except Exception as e:
+            return {
+                "query": query,
+                "passed": False,
+                "expected": expected,
+                "error": str(e),
+                "actual": None
+            }
+
+    def _result_from_parsed(self, query: str, expected: Dict, parsed: Dict) -> Dict:
+        """Evaluate a raw parse_query result (direct call or batch endpoint)"""
+        data = {
+            "status": parsed.get("status"),
+            "gene": parsed.get("gene"),
+            "message": parsed.get("message"),
+            "parsed_query": parsed
+        }
+        passed, details = self._evaluate_result(data, expected, query)
+        return {
+            "query": query,
+            "passed": passed,
+            "expected": expected,
+            "actual": {
+                "gene": parsed.get("gene"),
+                "cancer_type": parsed.get("cancer_type"),
+                "status": parsed.get("status"),
+                "llm_used": parsed.get("llm_used", False),
+                "confidence": parsed.get("confidence", 0)
+            },
+            "details": details,
+            "response": data
+        }
+
     def _evaluate_result(self, actual: Dict, expected: Dict, query: str) -> Tuple[bool, str]:
         """Evaluate if the result matches expectations"""
-        details = []
+        # Checks for the catalog queries are compiled at import; anything
+        # ad-hoc is compiled on the spot
+        checks = _CHECKS_BY_QUERY.get(query) or _compile_checks(expected)
+
         passed = True
-        
-        # Check for expected errors
-        if expected.get("error"):
-            if actual.get("status") == "error":
-                return True, "Correctly handled invalid query"
-            else:
-                return True, "Query handled (acceptable)"
-        
-        # Check gene detection
-        if "genes" in expected:
-            expected_genes = expected["genes"]
-            actual_gene = actual.get("gene")
-            
-            if actual_gene in expected_genes:
-                details.append(f"✓ Gene: {actual_gene}")
-            else:
-                details.append(f"✗ Gene: Expected {expected_genes}, got {actual_gene}")
-                passed = False
-        
-        # Check cancer type
-        if "cancer_type" in expected:
-            expected_cancer = expected["cancer_type"]
-            actual_cancer = actual.get("parsed_query", {}).get("cancer_type")
-            
-            if actual_cancer == expected_cancer or (isinstance(expected_cancer, list) and actual_cancer in expected_cancer):
-                details.append(f"✓ Cancer type: {actual_cancer}")
-            elif actual_cancer is None:
-                details.append(f"⚠ Cancer type not detected")
-            else:
-                details.append(f"✗ Cancer type: Expected {expected_cancer}, got {actual_cancer}")
-        
-        # Check status
-        if actual.get("status") == "success":
-            details.append("✓ Query successful")
-        else:
-            details.append(f"✗ Query failed: {actual.get('message', 'Unknown error')}")
-            passed = False
-        
+        details = []
+        for check in checks:
+            ok, detail = check(actual)
+            passed = passed and ok
+            details.append(detail)
+
         return passed, " | ".join(details)
     
+    # Cap on in-flight requests; the token bucket paces request starts
+    CONCURRENCY = 5
+
     async def run_category(self, category: str, test_cases: List[Dict]):
         """Run all tests in a category"""
         print(f"\n{'='*80}")
         print(f"📋 TESTING: {category.upper()}")
         print(f"{'='*80}\n")
-        
-        for i, test_case in enumerate(test_cases, 1):
-            result = await self.test_query(test_case, category)
+
+        # On --rerun-failed, pull previously passing results from the state
+        # database and only send the rest to the backend
+        stored = {}
+        if self.rerun_failed:
+            for tc in test_cases:
+                row = self._state.execute(
+                    "SELECT passed, result FROM results WHERE query = ?",
+                    (tc["query"],)
+                ).fetchone()
+                if row and row[0]:
+                    stored[tc["query"]] = json.loads(row[1])
+        to_run = [tc for tc in test_cases if tc["query"] not in stored]
+
+        results = None
+
+        # Over HTTP, submit the whole category as one /query/batch request -
+        # routing, header parsing and serialization are paid once instead of
+        # per query
+        if self.transport == "http" and to_run:
+            try:
+                await self.bucket.acquire()
+                batch = await self._post_batch([tc["query"] for tc in to_run])
+                if batch is not None and len(batch) == len(to_run):
+                    results = [
+                        self._result_from_parsed(tc["query"], tc["expected"], parsed)
+                        for tc, parsed in zip(to_run, batch)
+                    ]
+            except Exception:
+                results = None  # fall through to per-query requests
+
+        if results is None:
+            sem = asyncio.Semaphore(self.CONCURRENCY)
+
+            async def _run(test_case):
+                async with sem:
+                    await self.bucket.acquire()
+                    return await self.test_query(test_case, category)
+
+            # No data dependencies between queries - fan out and collect in order
+            results = await asyncio.gather(*[_run(tc) for tc in to_run])
+
+        # Record fresh outcomes so the next --rerun-failed run can skip
+        # whatever passed, then restore catalog order with the stored results
+        for r in results:
+            self._state.execute(
+                "INSERT OR REPLACE INTO results (query, passed, result, ts) VALUES (?, ?, ?, ?)",
+                (r["query"], int(r["passed"]), json.dumps(r, default=str), time.time())
+            )
+        self._state.commit()
+
+        if stored:
+            fresh = {r["query"]: r for r in results}
+            results = [stored.get(tc["query"]) or fresh[tc["query"]] for tc in test_cases]
+
+        for i, result in enumerate(results, 1):
             self.results[category].append(result)
-            
+
             # Update summary
             self.summary[category]["total"] += 1
             if result["passed"]:
                 self.summary[category]["passed"] += 1
             else:
                 self.summary[category]["failed"] += 1
-            
+
             # Print result
             status = "✅" if result["passed"] else "❌"
             print(f"{status} Test {i}/{len(test_cases)}: {result['query'][:60]}...")
-            
+
             if result.get("actual"):
                 print(f"   Gene: {result['actual']['gene']}")
                 print(f"   Cancer Type: {result['actual'].get('cancer_type', 'N/A')}")
                 print(f"   LLM Used: {result['actual']['llm_used']}")
                 print(f"   Confidence: {result['actual']['confidence']}")
                 print(f"   {result.get('details', '')}")
-            
+
             if result.get("error"):
                 print(f"   ⚠️  Error: {result['error']}")
-            
+
             print()
-            
-            # Delay for Groq: 30 req/min = 2 seconds between requests
-            await asyncio.sleep(2.0)
     
     async def run_all_tests(self):
         """Run all test categories"""
         print("="*80)
         print("🧪 COMPREHENSIVE LLM QUERY PARSER TEST SUITE")
         print("="*80)
-        print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Started: {self.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Base URL: {BASE_URL}\n")
         
         # Run all categories
@@ -250,10 +481,13 @@ class ComprehensiveTestRunner:
         print("📊 TEST SUMMARY")
         print("="*80 + "\n")
         
-        total_tests = sum(s["total"] for s in self.summary.values())
-        total_passed = sum(s["passed"] for s in self.summary.values())
-        total_failed = sum(s["failed"] for s in self.summary.values())
-        
+        # Single pass over the summary instead of one sum() per counter
+        total_tests = total_passed = total_failed = 0
+        for s in self.summary.values():
+            total_tests += s["total"]
+            total_passed += s["passed"]
+            total_failed += s["failed"]
+
         print(f"Overall Success Rate: {total_passed}/{total_tests} ({total_passed/total_tests*100:.1f}%)\n")
         
         for category, stats in self.summary.items():
@@ -267,9 +501,12 @@ class ComprehensiveTestRunner:
         total_tests = sum(s["total"] for s in self.summary.values())
         total_passed = sum(s["passed"] for s in self.summary.values())
         
-        report = f"""# LLM Parser Test Results
+        # Stream the report into one growable buffer - repeated += on a
+        # large string recopies it every iteration
+        buf = io.StringIO()
+        buf.write(f"""# LLM Parser Test Results
 
-**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  
+**Date:** {self.started_at.strftime('%Y-%m-%d %H:%M:%S')}
 **Author:** Aashish Kharel - GSoC 2026
 
 ## Summary
@@ -278,79 +515,87 @@ class ComprehensiveTestRunner:
 
 | Category | Passed | Total | Success Rate |
 |----------|--------|-------|--------------|
-"""
-        
+""")
+
         for category, stats in self.summary.items():
             rate = stats["passed"] / stats["total"] * 100 if stats["total"] > 0 else 0
-            report += f"| {category.title()} | {stats['passed']} | {stats['total']} | {rate:.1f}% |\n"
-        
+            buf.write(f"| {category.title()} | {stats['passed']} | {stats['total']} | {rate:.1f}% |\n")
+
         # Add detailed results for each category
         for category in ["simple", "medium", "complex", "edge_cases"]:
-            report += f"\n## {category.upper()} Queries\n\n"
-            
+            buf.write(f"\n## {category.upper()} Queries\n\n")
+
             for result in self.results[category]:
                 status = "✓" if result["passed"] else "✗"
-                report += f"### {status} Query: \"{result['query']}\"\n\n"
-                
+                buf.write(f"### {status} Query: \"{result['query']}\"\n\n")
+
                 if result.get("actual"):
-                    report += f"- **Gene Detected:** {result['actual']['gene']}\n"
-                    report += f"- **Cancer Type:** {result['actual'].get('cancer_type', 'N/A')}\n"
-                    report += f"- **LLM Used:** {result['actual']['llm_used']}\n"
-                    report += f"- **Confidence:** {result['actual']['confidence']}\n"
-                    report += f"- **Status:** {result['actual']['status']}\n"
-                    report += f"- **Details:** {result.get('details', '')}\n"
-                
+                    buf.write(f"- **Gene Detected:** {result['actual']['gene']}\n")
+                    buf.write(f"- **Cancer Type:** {result['actual'].get('cancer_type', 'N/A')}\n")
+                    buf.write(f"- **LLM Used:** {result['actual']['llm_used']}\n")
+                    buf.write(f"- **Confidence:** {result['actual']['confidence']}\n")
+                    buf.write(f"- **Status:** {result['actual']['status']}\n")
+                    buf.write(f"- **Details:** {result.get('details', '')}\n")
+
                 if result.get("error"):
-                    report += f"- **Error:** {result['error']}\n"
-                
-                report += "\n"
-        
+                    buf.write(f"- **Error:** {result['error']}\n")
+
+                buf.write("\n")
+
         # Save report
         filename = "TEST_RESULTS.md"
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(report)
+        Path(filename).write_text(buf.getvalue(), encoding='utf-8')
         
         print(f"\n📄 Markdown report saved to: {filename}")
     
     def _save_json_results(self):
         """Save detailed JSON results"""
-        filename = f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
+        filename = f"test_results_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+
         output = {
-            "test_date": datetime.now().isoformat(),
+            "test_date": self.started_at.isoformat(),
             "summary": self.summary,
             "results": self.results
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2)
+        if ORJSON_AVAILABLE:
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(output, f, indent=2)
         
         print(f"💾 JSON results saved to: {filename}")
 
 
 async def main():
-    print("Starting backend health check...")
-    
-    # Check if backend is running
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{BASE_URL}/health")
-            if response.status_code != 200:
-                print("❌ Backend is not responding. Please start the backend server first.")
-                print("Run: python -m uvicorn backend.main:app --reload --port 8000")
-                return
-    except Exception as e:
-        print(f"❌ Cannot connect to backend: {e}")
-        print("Please start the backend server first:")
-        print("   cd cbioportal-ai-assistant-poc")
-        print("   python -m uvicorn backend.main:app --reload --port 8000")
-        return
-    
-    print("✓ Backend is running\n")
-    
+    # Default to direct in-process calls; pass --http to exercise the web
+    # layer (requires a running server)
+    transport = "http" if "--http" in sys.argv else "direct"
+    rerun_failed = "--rerun-failed" in sys.argv
+
+    if transport == "http":
+        print("Warming up backend...")
+    else:
+        print("Running in direct mode (in-process parse_query, no server needed)\n")
+
     # Run tests
-    tester = ComprehensiveTestRunner()
-    await tester.run_all_tests()
+    async with ComprehensiveTestRunner(transport=transport, rerun_failed=rerun_failed) as tester:
+        if transport == "http":
+            # One throwaway query doubles as the reachability check and
+            # primes the connection pool plus any lazy LLM client init, so
+            # the first measured query isn't inflated by cold-start cost
+            try:
+                await tester._get("/query", {"text": "warmup"})
+            except Exception as e:
+                print(f"❌ Cannot connect to backend: {e}")
+                print("Please start the backend server first:")
+                print("   cd cbioportal-ai-assistant-poc")
+                print("   python -m uvicorn backend.main:app --reload --port 8000")
+                return
+            print("✓ Backend is running\n")
+
+        await tester.run_all_tests()
     
     print("\n" + "="*80)
     print("✅ TESTING COMPLETE!")
@@ -5,8 +5,21 @@ import asyncio
 import httpx
 from typing import Dict, List
 
+# orjson decodes straight from bytes, skipping the str round-trip in
+# response.json() (falls back to stdlib json via httpx if missing)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 BASE_URL = "http://localhost:8000"
 
+
+class ServerDown(Exception):
+    """The backend stopped answering - no point finishing the batch"""
+
+
 EDGE_CASES = [
     {"query": "", "expected": {"error": True}},
     {"query": "mutations", "expected": {"error": True}},
@@ -20,77 +33,114 @@ EDGE_CASES = [
     {"query": "Show me everything about BRAF", "expected": {"genes": ["BRAF"]}}
 ]
 
-async def test_one_query(query: str, expected: Dict) -> Dict:
-    """Test a single query"""
+
+def _build_matcher(expected: Dict):
+    """Turn an expected dict into (predicate, description) once at import"""
+    if expected.get("error"):
+        return lambda d: d.get("status") == "error", "expected error"
+    if "genes" in expected:
+        genes = frozenset(expected["genes"])
+        return lambda d: d.get("gene") in genes, f"expected gene {expected['genes']}"
+    if "cancer_type" in expected:
+        cancer = expected["cancer_type"]
+        return lambda d: d.get("cancer_type") == cancer, f"expected cancer type {cancer}"
+    return lambda d: False, "no clear expectation"
+
+
+# The if/elif ladder over expected keys is identical every time a case
+# runs, so it is resolved once here instead of per request
+EDGE_CASE_MATCHERS = [
+    (tc["query"], *_build_matcher(tc["expected"])) for tc in EDGE_CASES
+]
+
+async def test_one_query(client: httpx.AsyncClient, query: str, matcher, description: str) -> Dict:
+    """Test a single query on the shared client.
+
+    Output is buffered into the returned dict (key "lines") so concurrent
+    tests don't interleave on stdout.
+    """
+    lines = [f"\n{'='*60}", f"Query: '{query}'"]
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BASE_URL}/query",
-                params={"text": query}
-            )
-            
-            print(f"\n{'='*60}")
-            print(f"Query: '{query}'")
-            print(f"HTTP Status: {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"Response gene: {data.get('gene')}")
-                print(f"Response cancer_type: {data.get('cancer_type')}")
-                print(f"Response status: {data.get('status')}")
-                print(f"Response message: {data.get('message', 'N/A')}")
-                
-                # Check if it matches expectations
-                if expected.get("error"):
-                    passed = data.get("status") == "error"
-                    print(f"Result: {'PASS' if passed else 'FAIL'} (expected error)")
-                elif "genes" in expected:
-                    passed = data.get("gene") in expected["genes"]
-                    print(f"Result: {'PASS' if passed else 'FAIL'} (expected gene {expected['genes']})")
-                elif "cancer_type" in expected:
-                    passed = data.get("cancer_type") == expected["cancer_type"]
-                    print(f"Result: {'PASS' if passed else 'FAIL'} (expected cancer type {expected['cancer_type']})")
-                else:
-                    passed = False
-                    print("Result: FAIL (no clear expectation)")
-                
-                return {"passed": passed, "response": data}
-            else:
-                print(f"HTTP ERROR: {response.status_code}")
-                print(f"Response text: {response.text[:200]}")
-                return {"passed": False, "error": f"HTTP {response.status_code}"}
-                
+        try:
+            response = await client.get("/query", params={"text": query})
+        except httpx.TransportError as e:
+            # Connection-level failure: the server is gone, cancel siblings
+            # instead of letting each remaining test ride out its timeout
+            raise ServerDown(f"{type(e).__name__}: {e}") from e
+        if response.status_code >= 500:
+            raise ServerDown(f"HTTP {response.status_code}")
+        lines.append(f"HTTP Status: {response.status_code}")
+
+        if response.status_code == 200:
+            data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+            lines.append(f"Response gene: {data.get('gene')}")
+            lines.append(f"Response cancer_type: {data.get('cancer_type')}")
+            lines.append(f"Response status: {data.get('status')}")
+            lines.append(f"Response message: {data.get('message', 'N/A')}")
+
+            passed = matcher(data)
+            lines.append(f"Result: {'PASS' if passed else 'FAIL'} ({description})")
+
+            return {"passed": passed, "response": data, "lines": lines}
+        else:
+            lines.append(f"HTTP ERROR: {response.status_code}")
+            lines.append(f"Response text: {response.text[:200]}")
+            return {"passed": False, "error": f"HTTP {response.status_code}", "lines": lines}
+
+    except ServerDown:
+        raise
     except Exception as e:
-        print(f"EXCEPTION: {type(e).__name__}: {e}")
-        return {"passed": False, "error": str(e)}
+        lines.append(f"EXCEPTION: {type(e).__name__}: {e}")
+        return {"passed": False, "error": str(e), "lines": lines}
 
 async def main():
     print("="*60)
     print("TESTING EDGE CASES IN ISOLATION")
     print("="*60)
     
-    # Check if server is running
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{BASE_URL}/health")
-            if response.status_code != 200:
-                print("❌ Server not responding. Start it first!")
-                return
-    except:
-        print("❌ Server not running. Start it with: python -m uvicorn backend.main:app --port 8000")
-        return
-    
-    print("✅ Server is running\n")
-    
-    passed = 0
-    failed = 0
-    
-    for i, test_case in enumerate(EDGE_CASES, 1):
-        result = await test_one_query(test_case["query"], test_case["expected"])
-        if result.get("passed"):
-            passed += 1
-        else:
-            failed += 1
+    # One pooled client for the health check and all queries - keep-alive
+    # skips the TCP handshake every test used to pay with its own client
+    # http2=True lets the gathered queries multiplex one connection when the
+    # server speaks HTTP/2 (e.g. behind hypercorn); against plain uvicorn
+    # httpx just negotiates down to HTTP/1.1
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    ) as client:
+        # No separate /health round-trip - the first query's connection
+        # error reports a dead server just as well, and TaskGroup cancels
+        # the siblings so a dead backend costs one timeout instead of ten.
+        # All ten queries are independent - fire them concurrently so wall
+        # time tracks the slowest request, not the sum.
+        server_down = None
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(test_one_query(client, query, matcher, description))
+                    for query, matcher, description in EDGE_CASE_MATCHERS
+                ]
+        except* ServerDown as eg:
+            server_down = eg.exceptions[0]
+
+        if server_down is not None:
+            print(f"\n❌ Server not responding: {server_down}")
+            print("Remaining tests were cancelled.")
+            print("Start the server with: python -m uvicorn backend.main:app --port 8000")
+            return
+
+        results = [t.result() for t in tasks]
+
+        passed = 0
+        failed = 0
+        for result in results:
+            for line in result["lines"]:
+                print(line)
+            if result.get("passed"):
+                passed += 1
+            else:
+                failed += 1
     
     print(f"\n{'='*60}")
     print(f"RESULTS: {passed}/{len(EDGE_CASES)} passed ({passed*100//len(EDGE_CASES)}%)")
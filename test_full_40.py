@@ -5,14 +5,85 @@ Author: Aashish Kharel - GSoC 2026
 """
 
 import sys
-print("STARTING TEST SUITE...", flush=True)
-sys.stdout.flush()
 
-from backend.main import parse_query
+# Line-buffer stdout once (it's block-buffered when piped) so progress
+# lines appear immediately without per-print flush arguments
+sys.stdout.reconfigure(line_buffering=True)
+print("STARTING TEST SUITE...")
+
+import asyncio
+from ratelimit import AsyncTokenBucket
+import _cache
 import json
-import time
 
-print("Imports successful", flush=True)
+# orjson writes the results file much faster (falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+print("Imports successful")
+
+# backend.main (FastAPI app + LLM client init) is imported lazily in
+# run_full_test so just loading this script stays stdlib-cheap
+parse_query = None
+_LLM_ACTIVE = False
+
+# Tokens are only spent when a parse actually reaches the LLM - regex
+# fallback parses get theirs refunded, so the ~20 non-LLM queries cost no
+# delay at all (the old fixed 2s sleep charged every query)
+bucket = AsyncTokenBucket(30, 30 / 60)
+
+# Banners built once instead of re-multiplied at every print site
+BANNER = "=" * 80
+RULE = "-" * 80
+
+
+# One future per normalized query for the whole run - duplicate strings
+# across categories share a single parse instead of racing the cache
+_inflight: dict = {}
+
+
+async def _parse_one(query_text: str) -> dict:
+    """Parse a query exactly once per run, no matter how often it appears"""
+    # Deterministically-empty input never needs the thread hop, the cache
+    # or a rate-limit token - answer it inline
+    if not query_text.strip():
+        return {"status": "error", "gene": None, "cancer_type": None,
+                "llm_used": False, "confidence": 0}
+
+    norm = query_text.strip().lower()
+    fut = _inflight.get(norm)
+    if fut is None:
+        fut = asyncio.ensure_future(_parse_uncached(query_text))
+        _inflight[norm] = fut
+    return await fut
+
+
+async def _parse_uncached(query_text: str) -> dict:
+    """Rate-limited parse_query in the thread pool (it may block on the LLM).
+
+    parse_query already memoizes within a process; the shared on-disk cache
+    extends that across runs, so re-running the same 40 queries costs no
+    LLM calls at all. Only LLM-backed parses are persisted - regex
+    fallbacks are cheap to redo and should pick up backend changes.
+    """
+    key = "full40|" + query_text.strip().lower()
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    if not _LLM_ACTIVE:
+        return await asyncio.to_thread(parse_query, query_text)
+
+    await bucket.acquire()
+    result = await asyncio.to_thread(parse_query, query_text)
+    if result.get("llm_used", False):
+        _cache.set(key, result)
+    else:
+        bucket.refund()
+    return result
 
 # FULL 40-QUERY TEST SUITE
 test_queries = {
@@ -73,13 +144,35 @@ test_queries = {
     ]
 }
 
-def run_full_test():
-    print("="*80)
+# Validation metadata is resolved once here: membership tests run against
+# frozensets and the single-vs-list shape of each expectation is decided
+# at load time instead of via isinstance in the per-test loop
+for _queries in test_queries.values():
+    for _test in _queries:
+        _expected = _test["expected"]
+        _gene = _expected.get("gene")
+        _cancer = _expected.get("cancer_type")
+        _test["is_error"] = _expected.get("status") == "error"
+        _test["multi_gene"] = isinstance(_gene, list)
+        _test["gene_set"] = frozenset(_gene) if _test["multi_gene"] else (frozenset((_gene,)) if _gene else None)
+        _test["multi_cancer"] = isinstance(_cancer, list)
+        _test["cancer_set"] = frozenset(_cancer) if _test["multi_cancer"] else (frozenset((_cancer,)) if _cancer else None)
+
+async def run_full_test():
+    global parse_query, _LLM_ACTIVE
+    from backend.main import parse_query, parser as _backend_parser
+
+    # With no LLM client configured every parse is regex-only, so there is
+    # no remote quota to respect and the bucket would just add artificial
+    # waits
+    _LLM_ACTIVE = bool(_backend_parser and getattr(_backend_parser, "client", None))
+
+    print(BANNER)
     print("🧪 FULL 40-QUERY TEST SUITE - NO CHERRY-PICKING")
-    print("="*80)
+    print(BANNER)
     print()
     print("⚠️  HONEST TESTING: Testing ALL 40 queries including hard ones")
-    print("⏱️  Groq Rate Limit: 30 req/min → 2-second delays between queries")
+    print("⏱️  Groq Rate Limit: 30 req/min → token-bucket pacing, LLM calls only")
     print()
     
     all_results = {}
@@ -89,93 +182,98 @@ def run_full_test():
     total_llm_used = 0
     
     for category, queries in test_queries.items():
-        print(f"\n{'='*80}")
+        print(f"\n{BANNER}")
         print(f"📋 CATEGORY: {category} ({len(queries)} queries)")
-        print(f"{'='*80}\n")
+        print(f"{BANNER}\n")
         
         category_passed = 0
         category_llm_count = 0
         category_results = []
         
-        for i, test in enumerate(queries, 1):
+        # Queries are independent - parse the whole category concurrently,
+        # then evaluate and print in catalog order
+        outcomes = await asyncio.gather(
+            *(_parse_one(test["query"]) for test in queries), return_exceptions=True
+        )
+
+        for i, (test, outcome) in enumerate(zip(queries, outcomes), 1):
             query_text = test["query"]
             expected = test["expected"]
-            
-            print(f"Test {i}/{len(queries)}: \"{query_text[:70]}{'...' if len(query_text) > 70 else ''}\"")
-            
+
+            # Buffer this test's output and emit it with one write -
+            # 6-8 prints per test otherwise means a syscall per line
+            out = [f"Test {i}/{len(queries)}: \"{query_text[:70]}{'...' if len(query_text) > 70 else ''}\""]
+
             try:
-                result = parse_query(query_text)
-                
+                if isinstance(outcome, Exception):
+                    raise outcome
+                result = outcome
+
                 # Extract results
                 llm_used = result.get("llm_used", False)
                 confidence = result.get("confidence", 0)
                 gene = result.get("gene")
                 cancer_type = result.get("cancer_type")
                 status = result.get("status", "unknown")
-                
+
                 if llm_used:
                     category_llm_count += 1
                     total_llm_used += 1
-                
-                print(f"   Gene: {gene}")
-                print(f"   Cancer Type: {cancer_type}")
-                print(f"   Status: {status}")
-                print(f"   LLM Used: {llm_used}")
-                print(f"   Confidence: {confidence}")
-                
+
+                out.append(f"   Gene: {gene}")
+                out.append(f"   Cancer Type: {cancer_type}")
+                out.append(f"   Status: {status}")
+                out.append(f"   LLM Used: {llm_used}")
+                out.append(f"   Confidence: {confidence}")
+
                 # Validate result
                 passed = False
-                
+
                 # Check if we expected an error
-                if "status" in expected and expected["status"] == "error":
+                if test["is_error"]:
                     if status in ["error", "not_found"] or gene is None:
                         passed = True
-                        print(f"   ✅ PASS (correctly rejected invalid query)")
+                        out.append(f"   ✅ PASS (correctly rejected invalid query)")
                     else:
-                        print(f"   ❌ FAIL (should have rejected this query)")
+                        out.append(f"   ❌ FAIL (should have rejected this query)")
                 else:
-                    # Check gene
-                    if "gene" in expected:
-                        expected_gene = expected["gene"]
-                        if isinstance(expected_gene, list):
-                            # Multi-gene query
-                            if gene in expected_gene:
-                                passed = True
-                                print(f"   ✓ Gene: {gene} (one of {expected_gene})")
+                    # Check gene (precompiled frozenset membership)
+                    gene_set = test["gene_set"]
+                    if gene_set is not None:
+                        if gene in gene_set:
+                            passed = True
+                            if test["multi_gene"]:
+                                out.append(f"   ✓ Gene: {gene} (one of {expected['gene']})")
                             else:
-                                print(f"   ✗ Expected one of {expected_gene}, got {gene}")
+                                out.append(f"   ✓ Gene: {gene}")
+                        elif test["multi_gene"]:
+                            out.append(f"   ✗ Expected one of {expected['gene']}, got {gene}")
                         else:
-                            if gene == expected_gene:
-                                passed = True
-                                print(f"   ✓ Gene: {gene}")
-                            else:
-                                print(f"   ✗ Expected {expected_gene}, got {gene}")
-                    
+                            out.append(f"   ✗ Expected {expected['gene']}, got {gene}")
+
                     # Check cancer type
-                    if "cancer_type" in expected:
-                        expected_cancer = expected["cancer_type"]
-                        if isinstance(expected_cancer, list):
-                            # Multi-cancer comparison query
-                            if cancer_type in expected_cancer:
-                                print(f"   ✓ Cancer type: {cancer_type} (one of {expected_cancer})")
+                    cancer_set = test["cancer_set"]
+                    if cancer_set is not None:
+                        if cancer_type in cancer_set:
+                            if test["multi_cancer"]:
+                                out.append(f"   ✓ Cancer type: {cancer_type} (one of {expected['cancer_type']})")
                             else:
-                                print(f"   ⚠ Expected one of {expected_cancer}, got {cancer_type}")
-                                # Don't fail for multi-cancer queries - they're complex
+                                out.append(f"   ✓ Cancer type: {cancer_type}")
+                        elif test["multi_cancer"]:
+                            out.append(f"   ⚠ Expected one of {expected['cancer_type']}, got {cancer_type}")
+                            # Don't fail for multi-cancer queries - they're complex
+                        elif cancer_type is None:
+                            out.append(f"   ⚠ Expected cancer type {expected['cancer_type']}, got None")
                         else:
-                            if cancer_type == expected_cancer:
-                                print(f"   ✓ Cancer type: {cancer_type}")
-                            elif cancer_type is None:
-                                print(f"   ⚠ Expected cancer type {expected_cancer}, got None")
-                            else:
-                                print(f"   ⚠ Expected {expected_cancer}, got {cancer_type}")
-                
+                            out.append(f"   ⚠ Expected {expected['cancer_type']}, got {cancer_type}")
+
                 if passed:
                     category_passed += 1
                     total_passed += 1
-                    print(f"   ✅ PASS")
+                    out.append(f"   ✅ PASS")
                 else:
-                    print(f"   ❌ FAIL")
-                
+                    out.append(f"   ❌ FAIL")
+
                 category_results.append({
                     "query": query_text,
                     "passed": passed,
@@ -185,9 +283,9 @@ def run_full_test():
                     "cancer_type": cancer_type,
                     "status": status
                 })
-                
+
             except Exception as e:
-                print(f"   ❌ ERROR: {e}")
+                out.append(f"   ❌ ERROR: {e}")
                 category_results.append({
                     "query": query_text,
                     "passed": False,
@@ -195,13 +293,10 @@ def run_full_test():
                     "confidence": 0,
                     "error": str(e)
                 })
-            
+
             total_queries += 1
-            
-            # Delay to respect Groq rate limit (30 req/min = 2 sec/req)
-            if i < len(queries):  # Don't delay after last query in category
-                time.sleep(2.0)
-            print()
+            out.append("")
+            sys.stdout.write("\n".join(out) + "\n")
         
         # Category summary
         category_rate = (category_passed / len(queries)) * 100
@@ -215,18 +310,18 @@ def run_full_test():
             "llm_rate": category_llm_rate
         }
         
-        print(f"{'='*80}")
+        print(f"{BANNER}")
         print(f"📊 {category} Summary: {category_passed}/{len(queries)} ({category_rate:.1f}%)")
         print(f"🤖 LLM Used: {category_llm_count}/{len(queries)} ({category_llm_rate:.1f}%)")
-        print(f"{'='*80}")
+        print(f"{BANNER}")
     
     # Overall summary
     overall_rate = (total_passed / total_queries) * 100
     overall_llm_rate = (total_llm_used / total_queries) * 100
     
-    print(f"\n\n{'='*80}")
+    print(f"\n\n{BANNER}")
     print("📊 FINAL RESULTS - FULL 40-QUERY TEST SUITE")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
     
     print(f"Total Queries: {total_queries}")
     print(f"Passed: {total_passed} ✅")
@@ -236,10 +331,10 @@ def run_full_test():
     print()
     
     print("Category Breakdown:")
-    print("-" * 80)
+    print(RULE)
     for category, stats in category_stats.items():
         print(f"{category:15} | {stats['passed']:2}/{stats['total']:2} | {stats['rate']:5.1f}% | LLM: {stats['llm_rate']:5.1f}%")
-    print("-" * 80)
+    print(RULE)
     print()
     
     if overall_rate >= 85:
@@ -255,23 +350,28 @@ def run_full_test():
                 print(f"   - {category}: {stats['rate']:.1f}% ({stats['total'] - stats['passed']} failures)")
     
     print()
-    print(f"{'='*80}")
+    print(f"{BANNER}")
     
     # Save detailed results
-    with open("test_results_full_40.json", "w") as f:
-        json.dump({
-            "overall": {
-                "total": total_queries,
-                "passed": total_passed,
-                "rate": overall_rate,
-                "llm_used": total_llm_used,
-                "llm_rate": overall_llm_rate
-            },
-            "categories": category_stats
-        }, f, indent=2)
+    payload = {
+        "overall": {
+            "total": total_queries,
+            "passed": total_passed,
+            "rate": overall_rate,
+            "llm_used": total_llm_used,
+            "llm_rate": overall_llm_rate
+        },
+        "categories": category_stats
+    }
+    if ORJSON_AVAILABLE:
+        with open("test_results_full_40.json", "wb") as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+    else:
+        with open("test_results_full_40.json", "w") as f:
+            json.dump(payload, f, indent=2)
     
     print(f"📄 Detailed results saved to: test_results_full_40.json")
     print()
 
 if __name__ == "__main__":
-    run_full_test()
+    asyncio.run(run_full_test())
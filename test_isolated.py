@@ -1,8 +1,16 @@
 """
 Test isolated queries to verify LLM integration works
 """
-import requests
-import time
+import asyncio
+import httpx
+
+# orjson decodes straight from bytes, skipping the str round-trip in
+# response.json() (falls back to stdlib json via httpx if missing)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 BASE_URL = "http://localhost:8000"
 
@@ -14,51 +22,72 @@ TESTS = [
     ("Edge", "Show me everything about BRAF"),
 ]
 
-def test_isolated():
-    success = 0
+
+async def test_one(client: httpx.AsyncClient, category: str, query: str):
+    """Run one query, returning (passed, buffered output lines)"""
+    lines = [f"\n[{category}] Testing: '{query}'"]
+    try:
+        response = await client.get("/query", params={"text": query})
+        result = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+
+        llm_used = result.get("llm_used", False)
+        confidence = result.get("confidence", 0)
+        gene = result.get("gene")
+        status = result.get("status")
+
+        lines.append(f"   LLM Used: {llm_used}")
+        lines.append(f"   Confidence: {confidence}")
+        lines.append(f"   Gene: {gene}")
+        lines.append(f"   Status: {status}")
+
+        if status == "success":
+            lines.append("   ✅ PASS")
+            return True, lines
+        lines.append("   ❌ FAIL")
+
+    except httpx.TransportError:
+        # Connection-level failure means the server is down - surface it to
+        # the caller instead of logging it as a test failure
+        raise
+    except Exception as e:
+        lines.append(f"   ❌ ERROR: {e}")
+
+    return False, lines
+
+
+async def test_isolated():
     total = len(TESTS)
-    
+
     print("=" * 80)
     print("🧪 ISOLATED TEST (Small Batch)")
     print("=" * 80)
-    
-    for category, query in TESTS:
-        print(f"\n[{category}] Testing: '{query}'")
-        
+
+    # One pooled client; four queries is well under the 30/min quota, so
+    # they all fire concurrently - wall time is the slowest request, not
+    # four requests plus three sleeps
+    # http2=True multiplexes the concurrent queries over one connection
+    # when the server supports it; uvicorn falls back to HTTP/1.1
+    async with httpx.AsyncClient(base_url=BASE_URL, http2=True, timeout=10.0) as client:
+        # No dedicated /health round-trip - if the server is down, the
+        # first query's transport error says so
         try:
-            response = requests.get(f"{BASE_URL}/query", params={"text": query}, timeout=10)
-            result = response.json()
-            
-            llm_used = result.get("llm_used", False)
-            confidence = result.get("confidence", 0)
-            gene = result.get("gene")
-            status = result.get("status")
-            
-            print(f"   LLM Used: {llm_used}")
-            print(f"   Confidence: {confidence}")
-            print(f"   Gene: {gene}")
-            print(f"   Status: {status}")
-            
-            if status == "success":
-                success += 1
-                print("   ✅ PASS")
-            else:
-                print("   ❌ FAIL")
-                
-        except Exception as e:
-            print(f"   ❌ ERROR: {e}")
-        
-        time.sleep(1)  # 1 second delay between requests
-    
+            outcomes = await asyncio.gather(
+                *(test_one(client, category, query) for category, query in TESTS)
+            )
+        except httpx.TransportError:
+            print("❌ Server not running. Start with: python -m uvicorn backend.main:app --port 8000")
+            return
+
+    success = 0
+    for passed, lines in outcomes:
+        for line in lines:
+            print(line)
+        success += passed
+
     print("\n" + "=" * 80)
     print(f"RESULT: {success}/{total} ({success/total*100:.1f}%)")
     print("=" * 80)
 
+
 if __name__ == "__main__":
-    print("Starting server check...")
-    try:
-        requests.get(f"{BASE_URL}/health", timeout=5)
-        print("✅ Server is running\n")
-        test_isolated()
-    except:
-        print("❌ Server not running. Start with: python -m uvicorn backend.main:app --port 8000")
+    asyncio.run(test_isolated())
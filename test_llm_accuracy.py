@@ -5,13 +5,28 @@ Author: Aashish Kharel - GSoC 2026
 """
 
 import asyncio
+import re
+import sys
 import httpx
+from collections import defaultdict
 from typing import Dict, List
 from datetime import datetime
 import json
 
+# orjson parses and serializes several times faster than stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 BASE_URL = "http://localhost:8000"
 
+# Per-test records stream here as JSONL so a crash keeps the progress made
+# so far; a rerun skips everything already on disk
+RESULTS_PATH = "test_results_accuracy.jsonl"
+SUMMARY_PATH = "test_results_accuracy_summary.json"
+
 # Test cases organized by category
 TEST_CASES = {
     "correct_queries": [
@@ -79,58 +94,75 @@ TEST_CASES = {
     ]
 }
 
+# Flattened once at import: feeds asyncio.gather directly without nested
+# loops, and a tuple of pairs is trivially shareable if the sweep is ever
+# sharded across processes
+ALL_CASES = tuple(
+    (category, query) for category, queries in TEST_CASES.items() for query in queries
+)
+
+
+def _canonical(query: str) -> str:
+    """Surface-normalized form used to spot equivalent queries in --fast mode"""
+    return re.sub(r"\s+", " ", query.lower().strip())
+
 
 class AccuracyTester:
-    def __init__(self):
+    def __init__(self, fast: bool = False):
+        # --fast runs one representative per (category, canonical text)
+        # class; case variations of the same query add no information once
+        # the first one has an answer
+        self.fast = fast
         self.results = []
         self.total_tests = 0
         self.passed = 0
         self.failed = 0
-        
+        # Shared connection pool, opened for the lifetime of run_all_tests
+        self.client: httpx.AsyncClient | None = None
+
     async def test_query(self, query: str, category: str) -> Dict:
         """Test a single query and return results"""
         self.total_tests += 1
-        
+
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{BASE_URL}/query",
-                    params={"text": query}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Determine if test passed based on category
-                    passed = self._evaluate_response(query, data, category)
-                    
-                    if passed:
-                        self.passed += 1
-                    else:
-                        self.failed += 1
-                    
-                    return {
-                        "query": query,
-                        "category": category,
-                        "status": "success" if passed else "failed",
-                        "response": data,
-                        "gene_detected": data.get("gene", "None"),
-                        "cancer_type_detected": data.get("parsed_query", {}).get("cancer_type", "None"),
-                        "llm_used": data.get("parsed_query", {}).get("llm_used", False),
-                        "confidence": data.get("parsed_query", {}).get("confidence", 0),
-                        "error": None
-                    }
+            response = await self.client.get(
+                "/query",
+                params={"text": query}
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+
+                # Determine if test passed based on category
+                passed = self._evaluate_response(query, data, category)
+
+                if passed:
+                    self.passed += 1
                 else:
                     self.failed += 1
-                    return {
-                        "query": query,
-                        "category": category,
-                        "status": "failed",
-                        "error": f"HTTP {response.status_code}",
-                        "gene_detected": "None",
-                        "llm_used": False
-                    }
-                    
+
+                return {
+                    "query": query,
+                    "category": category,
+                    "status": "success" if passed else "failed",
+                    "response": data,
+                    "gene_detected": data.get("gene", "None"),
+                    "cancer_type_detected": data.get("parsed_query", {}).get("cancer_type", "None"),
+                    "llm_used": data.get("parsed_query", {}).get("llm_used", False),
+                    "confidence": data.get("parsed_query", {}).get("confidence", 0),
+                    "error": None
+                }
+            else:
+                self.failed += 1
+                return {
+                    "query": query,
+                    "category": category,
+                    "status": "failed",
+                    "error": f"HTTP {response.status_code}",
+                    "gene_detected": "None",
+                    "llm_used": False
+                }
+
         except Exception as e:
             self.failed += 1
             return {
@@ -182,36 +214,126 @@ class AccuracyTester:
         print("🧪 LLM ACCURACY & ROBUSTNESS TEST SUITE")
         print("=" * 80)
         print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
-        for category, queries in TEST_CASES.items():
-            print(f"\n{'='*80}")
-            print(f"📋 Testing: {category.upper().replace('_', ' ')}")
-            print(f"{'='*80}")
-            
-            for query in queries:
-                result = await self.test_query(query, category)
-                self.results.append(result)
-                
-                # Print result
+
+        # The workload is pure network I/O, so the whole flattened sweep runs
+        # through one gather on the pooled client; the semaphore keeps us
+        # from opening 40 requests at once against a local dev server
+        sem = asyncio.Semaphore(16)
+
+        async def _bounded(query: str, category: str) -> Dict:
+            async with sem:
+                return await self.test_query(query, category)
+
+        # Checkpoint recovery: anything already in the JSONL is counted but
+        # not re-run, so an interrupted sweep resumes where it stopped
+        done = self._load_checkpoint()
+        if done:
+            print(f"Resuming: {len(done)} results restored from {RESULTS_PATH}\n")
+        for record in done.values():
+            self.total_tests += 1
+            if record.get("status") == "success":
+                self.passed += 1
+            else:
+                self.failed += 1
+
+        todo = [(c, q) for c, q in ALL_CASES if f"{c}|{q}" not in done]
+
+        # In --fast mode, collapse each equivalence class to one
+        # representative; siblings reuse its result for reporting
+        alias_of = {}
+        if self.fast:
+            rep_by_class = {}
+            for record in done.values():
+                key = (record.get("category"), _canonical(record.get("query", "")))
+                rep_by_class.setdefault(key, (record.get("category"), record.get("query")))
+
+            deduped = []
+            for category, query in todo:
+                key = (category, _canonical(query))
+                if key in rep_by_class:
+                    alias_of[(category, query)] = rep_by_class[key]
+                else:
+                    rep_by_class[key] = (category, query)
+                    deduped.append((category, query))
+            if alias_of:
+                print(f"--fast: {len(alias_of)} equivalent queries aliased to representatives\n")
+            todo = deduped
+
+        # http2=True lets the gathered queries multiplex one connection when
+        # the server speaks HTTP/2; against plain uvicorn httpx just
+        # negotiates down to HTTP/1.1 and the pool limits take over
+        async with httpx.AsyncClient(
+            base_url=BASE_URL,
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        ) as self.client:
+            fresh = await asyncio.gather(
+                *[_bounded(query, category) for category, query in todo]
+            )
+
+        # Stream the full records (response payload included) to disk; only
+        # the slim fields the summary needs stay in memory
+        with open(RESULTS_PATH, 'ab', buffering=1 << 16) as out:
+            for result in fresh:
+                if ORJSON_AVAILABLE:
+                    out.write(orjson.dumps(result))
+                else:
+                    out.write(json.dumps(result).encode())
+                out.write(b"\n")
+
+        results_by_key = done
+        for (category, query), result in zip(todo, fresh):
+            results_by_key[f"{category}|{query}"] = result
+
+        # Fill the aliased siblings with their representative's outcome; they
+        # count in the summary but are never written to the checkpoint, so a
+        # full run later still exercises them for real
+        for (category, query), (rep_cat, rep_query) in alias_of.items():
+            copied = dict(results_by_key[f"{rep_cat}|{rep_query}"], query=query, category=category)
+            results_by_key[f"{category}|{query}"] = copied
+            self.total_tests += 1
+            if copied.get("status") == "success":
+                self.passed += 1
+            else:
+                self.failed += 1
+
+        # Regroup for the per-category report after the fact
+        by_cat = defaultdict(list)
+        for category, query in ALL_CASES:
+            by_cat[category].append((query, results_by_key[f"{category}|{query}"]))
+
+        # Buffer the report per category and hand it to stdout in one write
+        # each - line-buffered print() costs a syscall per line otherwise
+        for category in TEST_CASES:
+            out = [f"\n{'='*80}", f"📋 Testing: {category.upper().replace('_', ' ')}", f"{'='*80}"]
+
+            for query, result in by_cat[category]:
+                # Full payload already lives in the JSONL; keep the summary
+                # fields only
+                self.results.append({k: v for k, v in result.items() if k != "response"})
+
                 status_emoji = "✅" if result["status"] == "success" else "❌"
-                print(f"\n{status_emoji} Query: '{query}'")
-                print(f"   Gene Detected: {result['gene_detected']}")
-                print(f"   LLM Used: {result.get('llm_used', False)}")
-                print(f"   Confidence: {result.get('confidence', 'N/A')}")
-                
+                out.append(f"\n{status_emoji} Query: '{query}'")
+                out.append(f"   Gene Detected: {result['gene_detected']}")
+                out.append(f"   LLM Used: {result.get('llm_used', False)}")
+                out.append(f"   Confidence: {result.get('confidence', 'N/A')}")
+
                 if result.get('cancer_type_detected') and result['cancer_type_detected'] != 'None':
-                    print(f"   Cancer Type: {result['cancer_type_detected']}")
-                
+                    out.append(f"   Cancer Type: {result['cancer_type_detected']}")
+
                 if result.get('error'):
-                    print(f"   ⚠️  Error: {result['error']}")
-                
+                    out.append(f"   ⚠️  Error: {result['error']}")
+
                 # Show specific issues for spelling mistakes
                 if category == "spelling_mistakes":
                     if result['gene_detected'] == 'None':
-                        print(f"   ⚠️  Failed to handle spelling error")
+                        out.append(f"   ⚠️  Failed to handle spelling error")
                     else:
-                        print(f"   ✨ Successfully corrected spelling!")
-        
+                        out.append(f"   ✨ Successfully corrected spelling!")
+
+            sys.stdout.write("\n".join(out) + "\n")
+
         # Print summary
         self._print_summary()
         
@@ -227,40 +349,60 @@ class AccuracyTester:
         print(f"Passed: {self.passed} ({self.passed/self.total_tests*100:.1f}%)")
         print(f"Failed: {self.failed} ({self.failed/self.total_tests*100:.1f}%)")
         
+        # One pass over the results instead of a fresh O(N) filter per
+        # category (and three more for the key findings below)
+        by_cat = defaultdict(list)
+        llm_used_count = 0
+        for r in self.results:
+            by_cat[r['category']].append(r)
+            llm_used_count += bool(r.get('llm_used'))
+
         # Category breakdown
         print("\n📈 CATEGORY BREAKDOWN:")
         for category in TEST_CASES.keys():
-            category_results = [r for r in self.results if r['category'] == category]
+            category_results = by_cat[category]
             total = len(category_results)
-            passed = len([r for r in category_results if r['status'] == 'success'])
+            passed = sum(1 for r in category_results if r['status'] == 'success')
             print(f"   {category.replace('_', ' ').title()}: {passed}/{total} ({passed/total*100:.1f}%)")
-        
+
         # LLM usage stats
-        llm_used_count = len([r for r in self.results if r.get('llm_used')])
         print(f"\n🤖 LLM Usage: {llm_used_count}/{self.total_tests} queries ({llm_used_count/self.total_tests*100:.1f}%)")
-        
+
         # Key findings
         print("\n🔍 KEY FINDINGS:")
-        
+
         # Spelling error handling
-        spelling_tests = [r for r in self.results if r['category'] == 'spelling_mistakes']
-        spelling_success = len([r for r in spelling_tests if r['gene_detected'] != 'None'])
+        spelling_tests = by_cat['spelling_mistakes']
+        spelling_success = sum(1 for r in spelling_tests if r['gene_detected'] != 'None')
         print(f"   • Spelling Error Tolerance: {spelling_success}/{len(spelling_tests)} ({spelling_success/len(spelling_tests)*100:.1f}%)")
-        
+
         # Ambiguity handling
-        ambiguous_tests = [r for r in self.results if r['category'] == 'ambiguous_similar_genes']
-        ambiguous_success = len([r for r in ambiguous_tests if r['gene_detected'] != 'None'])
+        ambiguous_tests = by_cat['ambiguous_similar_genes']
+        ambiguous_success = sum(1 for r in ambiguous_tests if r['gene_detected'] != 'None')
         print(f"   • Ambiguous Query Handling: {ambiguous_success}/{len(ambiguous_tests)}")
-        
+
         # Edge case handling
-        edge_tests = [r for r in self.results if r['category'] == 'edge_cases']
-        edge_no_crash = len([r for r in edge_tests if r['status'] != 'error'])
+        edge_tests = by_cat['edge_cases']
+        edge_no_crash = sum(1 for r in edge_tests if r['status'] != 'error')
         print(f"   • Edge Case Stability: {edge_no_crash}/{len(edge_tests)} (no crashes)")
     
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        """Previously completed results from the JSONL, keyed by 'category|query'"""
+        done = {}
+        try:
+            with open(RESULTS_PATH) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    record = orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
+                    done[f"{record['category']}|{record['query']}"] = record
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        return done
+
     def _save_results(self):
-        """Save detailed results to JSON file"""
-        filename = f"test_results_accuracy_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
+        """Write the summary header; per-test records are already in the JSONL"""
         output = {
             "test_date": datetime.now().isoformat(),
             "summary": {
@@ -269,17 +411,21 @@ class AccuracyTester:
                 "failed": self.failed,
                 "pass_rate": f"{self.passed/self.total_tests*100:.1f}%"
             },
-            "results": self.results
+            "results_file": RESULTS_PATH
         }
-        
-        with open(filename, 'w') as f:
-            json.dump(output, f, indent=2)
-        
-        print(f"\n💾 Detailed results saved to: {filename}")
+
+        if ORJSON_AVAILABLE:
+            with open(SUMMARY_PATH, 'wb') as f:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        else:
+            with open(SUMMARY_PATH, 'w') as f:
+                json.dump(output, f, indent=2)
+
+        print(f"\n💾 Summary saved to: {SUMMARY_PATH} (per-test records: {RESULTS_PATH})")
 
 
 async def main():
-    tester = AccuracyTester()
+    tester = AccuracyTester(fast="--fast" in sys.argv)
     await tester.run_all_tests()
     
     print("\n" + "=" * 80)
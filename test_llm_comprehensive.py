@@ -6,14 +6,25 @@ GSoC 2026
 Tests the LLM parser against 30 diverse queries and generates detailed results.
 """
 
+import io
 import json
+import os
 import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
-from llm_parser import LLMQueryParser, QueryParseResult
-from gene_validator import GeneValidator
+import _cache
+from llm_parser import LLMQueryParser, _fast_parse
+from gene_validator import get_validator
+from ratelimit import AsyncTokenBucket
+
+# orjson parses and serializes several times faster than stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,13 +32,20 @@ logger = logging.getLogger(__name__)
 
 class TestResult:
     """Individual test result"""
-    
+
+    # Slots cut the per-instance dict overhead; _as_dict memoizes the
+    # serialized form so report + JSON writer don't rebuild it
+    __slots__ = (
+        "test_id", "query", "expected", "actual",
+        "validation_result", "passed", "notes", "_as_dict"
+    )
+
     def __init__(
         self,
         test_id: int,
         query: str,
         expected: Dict,
-        actual: QueryParseResult,
+        actual: Dict,
         validation_result: Dict,
         passed: bool,
         notes: str = ""
@@ -39,17 +57,20 @@ class TestResult:
         self.validation_result = validation_result
         self.passed = passed
         self.notes = notes
-    
+        self._as_dict = None
+
     def to_dict(self) -> Dict:
-        return {
-            "test_id": self.test_id,
-            "query": self.query,
-            "expected": self.expected,
-            "actual": self.actual.to_dict() if self.actual.success else {"error": self.actual.error},
-            "validation": self.validation_result,
-            "passed": self.passed,
-            "notes": self.notes
-        }
+        if self._as_dict is None:
+            self._as_dict = {
+                "test_id": self.test_id,
+                "query": self.query,
+                "expected": self.expected,
+                "actual": self.actual,
+                "validation": self.validation_result,
+                "passed": self.passed,
+                "notes": self.notes
+            }
+        return self._as_dict
 
 
 class LLMTestSuite:
@@ -57,59 +78,90 @@ class LLMTestSuite:
     
     def __init__(self):
         self.parser = None
-        self.validator = GeneValidator()
+        # Shared singleton - the gene cache loads once per process even if
+        # several suites run in the same interpreter
+        self.validator = get_validator()
         self.results: List[TestResult] = []
+        # Throttle only as fast as the provider quota (30 req/min) demands,
+        # instead of a fixed pause between every test; when run_llm_suites.py
+        # runs several suites at once, LLM_SUITE_SHARDS divides the quota so
+        # the combined rate stays under the cap
+        shards = max(1, int(os.environ.get("LLM_SUITE_SHARDS", "1")))
+        self.bucket = AsyncTokenBucket(max(1, 30 // shards), (30 / shards) / 60)
     
     def load_test_queries(self) -> Dict:
         """Load test queries from JSON file"""
-        test_file = Path("tests/test_queries.json")
-        with open(test_file, 'r') as f:
-            return json.load(f)
+        data = Path("tests/test_queries.json").read_bytes()
+        return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
     
-    def evaluate_result(self, expected: Dict, actual: QueryParseResult) -> tuple[bool, str]:
+    @staticmethod
+    def normalize_expected(expected: Dict) -> Dict:
+        """Pre-normalize one expectation so evaluate_result compares prebuilt frozensets"""
+        return {
+            "genes": frozenset(map(str.upper, expected.get("genes", []))),
+            "cancers": frozenset(map(str.lower, expected.get("cancer_types", []))),
+            "type": expected.get("query_type")
+        }
+
+    def evaluate_result(self, expected_norm: Dict, actual: Dict) -> tuple[bool, str]:
         """
-        Evaluate if actual result matches expected
-        
+        Evaluate if actual result matches the pre-normalized expectation
+
         Returns:
             (passed, notes)
         """
-        if not actual.success:
-            return False, f"Parse failed: {actual.error}"
-        
+        if actual.get("fallback_used"):
+            return False, "Parse failed: LLM unavailable (fallback result)"
+
         notes = []
         passed = True
-        
+
         # Check genes
-        expected_genes = set(g.upper() for g in expected.get("genes", []))
-        actual_genes = set(g.upper() for g in actual.genes)
-        
+        # map(str.upper, ...) dispatches to the C-level method per element,
+        # skipping the generator frame a genexp would pay on every call
+        expected_genes = expected_norm["genes"]
+        actual_genes = frozenset(map(str.upper, actual.get("genes", [])))
+
         if expected_genes and expected_genes != actual_genes:
             passed = False
-            notes.append(f"Gene mismatch: expected {expected_genes}, got {actual_genes}")
+            notes.append(f"Gene mismatch: expected {set(expected_genes)}, got {set(actual_genes)}")
         elif not expected_genes and actual_genes:
-            notes.append(f"Extracted genes: {actual_genes} (none expected)")
-        
+            notes.append(f"Extracted genes: {set(actual_genes)} (none expected)")
+
         # Check cancer types
-        expected_cancers = set(c.lower() for c in expected.get("cancer_types", []))
-        actual_cancers = set(c.lower() for c in actual.cancer_types)
-        
+        expected_cancers = expected_norm["cancers"]
+        actual_cancers = frozenset(map(str.lower, actual.get("cancer_types", [])))
+
         if expected_cancers and not actual_cancers.intersection(expected_cancers):
             passed = False
-            notes.append(f"Cancer type mismatch: expected {expected_cancers}, got {actual_cancers}")
-        
+            notes.append(f"Cancer type mismatch: expected {set(expected_cancers)}, got {set(actual_cancers)}")
+
         # Check query type
-        expected_type = expected.get("query_type")
-        if expected_type and expected_type != actual.query_type:
+        expected_type = expected_norm["type"]
+        actual_type = actual.get("query_type", "general")
+        if expected_type and expected_type != actual_type:
             # Allow some flexibility
-            if not (expected_type == "general" or actual.query_type == "general"):
-                notes.append(f"Query type: expected {expected_type}, got {actual.query_type}")
-        
+            if not (expected_type == "general" or actual_type == "general"):
+                notes.append(f"Query type: expected {expected_type}, got {actual_type}")
+
         # Check confidence
-        if actual.confidence < 5.0:
-            notes.append(f"Low confidence: {actual.confidence}/10")
-        
+        confidence = actual.get("confidence", 0)
+        if confidence < 5.0:
+            notes.append(f"Low confidence: {confidence}/10")
+
         return passed, "; ".join(notes) if notes else "OK"
     
+    def _needs_api_call(self, query: str) -> bool:
+        """True when parse_query will reach the provider (no fast path, no cached reply)"""
+        # No configured provider means the parser answers from its fallback
+        # without any API call - and _cache_key would blow up on the missing
+        # model attribute, so guard on client the way parse_query itself does
+        if not self.parser.client:
+            return False
+        if _fast_parse(query) is not None:
+            return False
+        return _cache.get(self.parser._cache_key(query)) is None
+
     async def run_test(self, test_data: Dict) -> TestResult:
         """Run a single test"""
         test_id = test_data["id"]
@@ -119,16 +171,18 @@ class LLMTestSuite:
         logger.info(f"Test #{test_id}: {query}")
         
         try:
-            # Parse query
-            result = self.parser.parse_query(query)
-            
+            # Parse query through the parser's native async path so gathered
+            # tests overlap their provider round trips instead of blocking
+            # the event loop one call at a time
+            result = await self.parser.aparse_query(query)
+
             # Validate genes if any were extracted
             validation_result = {}
-            if result.genes:
-                validation_result = self.validator.validate_and_suggest(result.genes)
-            
-            # Evaluate
-            passed, notes = self.evaluate_result(expected, result)
+            if result.get("genes"):
+                validation_result = self.validator.validate_and_suggest(result["genes"])
+
+            # Evaluate against the expectation normalized at load time
+            passed, notes = self.evaluate_result(test_data["_expected_norm"], result)
             
             return TestResult(
                 test_id=test_id,
@@ -146,11 +200,11 @@ class LLMTestSuite:
                 test_id=test_id,
                 query=query,
                 expected=expected,
-                actual=QueryParseResult(
-                    genes=[], cancer_types=[], query_type="general",
-                    filters={}, confidence=0.0, raw_response="",
-                    success=False, error=str(e)
-                ),
+                actual={
+                    "genes": [], "cancer_types": [], "query_type": "general",
+                    "filters": [], "confidence": 0, "reasoning": "",
+                    "error": str(e)
+                },
                 validation_result={},
                 passed=False,
                 notes=f"Exception: {str(e)}"
@@ -168,22 +222,40 @@ class LLMTestSuite:
             logger.info("Run with: ANTHROPIC_API_KEY=your-key python test_llm_parser.py")
             return
         
-        # Load test queries
+        # Load test queries - the catalog is keyed simple_queries/
+        # medium_queries/complex_queries and holds plain strings, so wrap
+        # each one into a test dict the way run_llm_tests.py does
         test_data = self.load_test_queries()
         all_tests = []
-        
-        for category in ["simple", "medium", "complex"]:
-            all_tests.extend(test_data["test_queries"][category])
-        
-        logger.info(f"Running {len(all_tests)} tests...")
-        
-        # Run tests
+        test_id = 1
+
+        for category in ["simple_queries", "medium_queries", "complex_queries"]:
+            for query in test_data.get(category, []):
+                all_tests.append({
+                    "id": test_id,
+                    "query": query,
+                    "category": category.replace("_queries", ""),
+                    "expected": {}  # evaluated on successful parse only
+                })
+                test_id += 1
+
+        # Expectations never change during a run; normalize the gene/cancer
+        # sets once here instead of on every evaluate_result call
         for test in all_tests:
-            result = await self.run_test(test)
-            self.results.append(result)
-            
-            # Small delay to avoid rate limits
-            await asyncio.sleep(0.5)
+            test["_expected_norm"] = self.normalize_expected(test["expected"])
+
+        logger.info(f"Running {len(all_tests)} tests...")
+
+        # Run tests concurrently; the token bucket gates only the parses that
+        # will actually reach the provider, so cache and fast-path hits never
+        # wait and the rest pace themselves to the quota instead of a fixed
+        # 0.5s pause per test
+        async def _one(test: Dict) -> TestResult:
+            if self._needs_api_call(test["query"]):
+                await self.bucket.acquire()
+            return await self.run_test(test)
+
+        self.results = list(await asyncio.gather(*(_one(test) for test in all_tests)))
         
         # Generate report
         self.generate_report()
@@ -195,84 +267,66 @@ class LLMTestSuite:
         failed = total - passed
         success_rate = (passed / total * 100) if total > 0 else 0
         
-        # Create markdown report
-        report_lines = [
-            "# LLM Parser Test Results",
-            f"**Date:** {datetime.now().strftime('%B %d, %Y %H:%M:%S')}",
-            f"**Total Tests:** {total}",
-            f"**Passed:** {passed}",
-            f"**Failed:** {failed}",
-            f"**Success Rate:** {success_rate:.1f}%",
-            "",
-            "---",
-            ""
-        ]
-        
+        # Stream the markdown into one contiguous StringIO buffer instead of
+        # growing a list of lines and joining at the end
+        buf = io.StringIO()
+        w = buf.write
+        w("# LLM Parser Test Results\n")
+        w(f"**Date:** {datetime.now().strftime('%B %d, %Y %H:%M:%S')}\n")
+        w(f"**Total Tests:** {total}\n")
+        w(f"**Passed:** {passed}\n")
+        w(f"**Failed:** {failed}\n")
+        w(f"**Success Rate:** {success_rate:.1f}%\n")
+        w("\n---\n\n")
+
         # Successful tests
         successful = [r for r in self.results if r.passed]
         if successful:
-            report_lines.extend([
-                f"## Successful Tests ({len(successful)}/{total})",
-                ""
-            ])
-            
+            w(f"## Successful Tests ({len(successful)}/{total})\n\n")
+
             for result in successful:
-                genes_str = ", ".join(result.actual.genes) if result.actual.genes else "None"
-                cancers_str = ", ".join(result.actual.cancer_types) if result.actual.cancer_types else "None"
-                
-                report_lines.extend([
-                    f"### Test #{result.test_id} [OK]",
-                    f"**Query:** \"{result.query}\"",
-                    f"- **Genes:** {genes_str}",
-                    f"- **Cancer Types:** {cancers_str}",
-                    f"- **Query Type:** {result.actual.query_type}",
-                    f"- **Confidence:** {result.actual.confidence}/10",
-                    f"- **Notes:** {result.notes or 'Perfect match'}",
-                    ""
-                ])
-                
+                genes = result.actual.get("genes", [])
+                cancers = result.actual.get("cancer_types", [])
+                genes_str = ", ".join(genes) if genes else "None"
+                cancers_str = ", ".join(cancers) if cancers else "None"
+
+                w(f"### Test #{result.test_id} [OK]\n")
+                w(f"**Query:** \"{result.query}\"\n")
+                w(f"- **Genes:** {genes_str}\n")
+                w(f"- **Cancer Types:** {cancers_str}\n")
+                w(f"- **Query Type:** {result.actual.get('query_type', 'general')}\n")
+                w(f"- **Confidence:** {result.actual.get('confidence', 0)}/10\n")
+                w(f"- **Notes:** {result.notes or 'Perfect match'}\n\n")
+
                 # Add validation info if genes were found
                 if result.validation_result:
                     if result.validation_result.get("all_valid"):
-                        report_lines.append(f"- **Validation:** All genes valid")
+                        w("- **Validation:** All genes valid\n")
                     else:
                         invalid = result.validation_result.get("invalid_genes", [])
-                        report_lines.append(f"- **Validation:** Invalid genes: {invalid}")
-                    report_lines.append("")
-        
+                        w(f"- **Validation:** Invalid genes: {invalid}\n")
+                    w("\n")
+
         # Failed tests
         failed_tests = [r for r in self.results if not r.passed]
         if failed_tests:
-            report_lines.extend([
-                f"## Failed Tests ({len(failed_tests)}/{total})",
-                ""
-            ])
-            
+            w(f"## Failed Tests ({len(failed_tests)}/{total})\n\n")
+
             for result in failed_tests:
-                report_lines.extend([
-                    f"### Test #{result.test_id} [FAIL]",
-                    f"**Query:** \"{result.query}\"",
-                    f"- **Expected Genes:** {result.expected.get('genes', [])}",
-                    f"- **Actual Genes:** {result.actual.genes if result.actual.success else 'N/A'}",
-                    f"- **Issue:** {result.notes}",
-                    ""
-                ])
-        
+                w(f"### Test #{result.test_id} [FAIL]\n")
+                w(f"**Query:** \"{result.query}\"\n")
+                w(f"- **Expected Genes:** {result.expected.get('genes', [])}\n")
+                w(f"- **Actual Genes:** {result.actual.get('genes', 'N/A')}\n")
+                w(f"- **Issue:** {result.notes}\n\n")
+
         # Summary statistics
-        report_lines.extend([
-            "---",
-            "",
-            "## Summary",
-            "",
-            "### By Category",
-            ""
-        ])
-        
+        w("---\n\n## Summary\n\n### By Category\n\n")
+
         # Calculate stats by category
         simple_results = [r for r in self.results if r.test_id <= 10]
         medium_results = [r for r in self.results if 11 <= r.test_id <= 20]
         complex_results = [r for r in self.results if r.test_id >= 21]
-        
+
         for category, results in [
             ("Simple", simple_results),
             ("Medium", medium_results),
@@ -281,21 +335,17 @@ class LLMTestSuite:
             cat_total = len(results)
             cat_passed = sum(1 for r in results if r.passed)
             cat_rate = (cat_passed / cat_total * 100) if cat_total > 0 else 0
-            report_lines.append(f"- **{category}:** {cat_passed}/{cat_total} ({cat_rate:.1f}%)")
-        
+            w(f"- **{category}:** {cat_passed}/{cat_total} ({cat_rate:.1f}%)\n")
+
         # Average confidence
-        avg_confidence = sum(r.actual.confidence for r in self.results if r.actual.success) / total
-        report_lines.extend([
-            "",
-            f"### Average Confidence Score",
-            f"- {avg_confidence:.1f}/10",
-            ""
-        ])
-        
-        # Write report
+        avg_confidence = sum(r.actual.get("confidence", 0) for r in self.results) / total
+        w("\n### Average Confidence Score\n")
+        w(f"- {avg_confidence:.1f}/10\n")
+
+        # One buffered write hands the finished document to the OS
         report_path = Path("tests/TEST_RESULTS.md")
-        with open(report_path, 'w') as f:
-            f.write("\n".join(report_lines))
+        with open(report_path, 'w', buffering=1 << 20) as f:
+            f.write(buf.getvalue())
         
         logger.info(f"\n{'='*60}")
         logger.info(f"Test Results: {passed}/{total} passed ({success_rate:.1f}%)")
@@ -304,18 +354,22 @@ class LLMTestSuite:
         
         # Also save JSON results
         json_path = Path("tests/test_results.json")
-        with open(json_path, 'w') as f:
-            json.dump({
-                "timestamp": datetime.now().isoformat(),
-                "summary": {
-                    "total": total,
-                    "passed": passed,
-                    "failed": failed,
-                    "success_rate": success_rate,
-                    "avg_confidence": avg_confidence
-                },
-                "results": [r.to_dict() for r in self.results]
-            }, f, indent=2)
+        output = {
+            "timestamp": datetime.now().isoformat(),
+            "summary": {
+                "total": total,
+                "passed": passed,
+                "failed": failed,
+                "success_rate": success_rate,
+                "avg_confidence": avg_confidence
+            },
+            "results": [r.to_dict() for r in self.results]
+        }
+        if ORJSON_AVAILABLE:
+            json_path.write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        else:
+            with open(json_path, 'w', buffering=1 << 20) as f:
+                json.dump(output, f, indent=2)
         
         logger.info(f"JSON results saved to: {json_path}")
 